@@ -0,0 +1,74 @@
+# For immutable views over the loaded rows
+from types import MappingProxyType
+from typing import NamedTuple
+import decimal
+
+from database.models import Nutritions
+
+
+class NutritionInfo(NamedTuple):
+    id: int
+    name: str
+    weight: decimal.Decimal
+    kcal: decimal.Decimal
+    carbonate: decimal.Decimal
+    sugar: decimal.Decimal
+    fat: decimal.Decimal
+    protein: decimal.Decimal
+
+
+class NutritionIndex:
+    """In-process copy of the nutritions table keyed by class id and name.
+    The table is small and static, so it is read once at startup and
+    lookups on the request path never touch the database.
+    """
+
+    def __init__(self):
+        # Replaced as a whole on reload, so a lookup never mixes two snapshots
+        self._snapshot = (MappingProxyType({}), MappingProxyType({}))
+
+    def load(self, session_factory=None) -> int:
+        """Reads the whole table and swaps it in as the new snapshot
+
+        Arguments:
+            session_factory (callable): Creates a SQLAlchemy session, defaults to SessionLocal
+
+        Returns:
+            count (int): The number of rows loaded
+        """
+        if session_factory is None:
+            from database.session import SessionLocal
+            session_factory = SessionLocal
+        db = session_factory()
+        try:
+            rows = [NutritionInfo(id=n.id, name=n.name, weight=n.weight, kcal=n.kcal, carbonate=n.carbonate,
+                                  sugar=n.sugar, fat=n.fat, protein=n.protein)
+                    for n in db.query(Nutritions).all()]
+        finally:
+            db.close()
+        self._snapshot = (MappingProxyType({row.id: row for row in rows}),
+                          MappingProxyType({row.name: row for row in rows}))
+        return len(rows)
+
+    def get(self, label):
+        """Finds the nutrition facts of a model label. Labels are class ids
+        in the nutritions table, falling back to the food name.
+
+        Arguments:
+            label (str | int): The label predicted by the model
+
+        Returns:
+            info (NutritionInfo | None): The matching row, None when unknown
+        """
+        by_id, by_name = self._snapshot
+        try:
+            info = by_id.get(int(label))
+        except (TypeError, ValueError):
+            info = None
+        return info or by_name.get(str(label))
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+
+nutrition_index = NutritionIndex()
@@ -0,0 +1,152 @@
+# For environment variables
+import os
+# For detecting which ML Devices we can use
+import platform
+# For actually using the YOLO models. Every backend loads through ultralytics,
+# which imports torch: the exported backends only change the execution engine
+# of the forward pass (ONNX Runtime / OpenVINO instead of PyTorch), not the
+# torch import cost or the RSS of the worker
+from ultralytics import YOLO
+
+BACKEND = os.environ.get("YOLO_BACKEND", "torch")  # torch, onnx or openvino
+SERVING_MODE = os.environ.get("YOLO_SERVING_MODE", "inline")  # inline, or process to run the model in a process pool
+INT8 = os.environ.get("YOLO_INT8", "0") == "1"  # Quantize weights to INT8 (onnx / openvino)
+IMGSZ = int(os.environ.get("YOLO_IMGSZ", "640"))  # Input size of exported models
+INT8_DATA = os.environ.get("YOLO_INT8_DATA")  # Calibration dataset yaml for OpenVINO INT8
+
+
+class TorchBackend:
+    """Runs the PyTorch weights on the best device of the host"""
+    name = "torch"
+
+    @staticmethod
+    def _get_device():
+        """Gets best device for your system
+
+        Returns:
+            device (str): The device to use for YOLO for your system
+        """
+        import torch
+        if platform.system().lower() == "darwin":
+            return "mps"
+        if torch.cuda.is_available():
+            return "cuda"
+        return "cpu"
+
+    def load(self, path: str):
+        """Loads a weights file
+
+        Arguments:
+            path (str): Path to a .pt weights file
+
+        Returns:
+            model (Model): The loaded model
+            device (str): The device it runs on
+        """
+        device = self._get_device()
+        model = YOLO(path)
+        model.to(device)
+        return model, device
+
+
+class OnnxBackend:
+    """Runs an exported ONNX model on the ONNX Runtime CPU provider, with
+    the ultralytics pre / post-processing around it.
+    A .pt path is exported next to the weights on first load and the
+    exported file is reused afterwards.
+    """
+    name = "onnx"
+
+    def __init__(self, int8: bool = INT8, imgsz: int = IMGSZ):
+        self.int8 = int8
+        self.imgsz = imgsz
+
+    def prepare(self, path: str) -> str:
+        """Exports and quantizes the weights if needed
+
+        Arguments:
+            path (str): Path to .pt weights or an exported .onnx file
+
+        Returns:
+            path (str): Path to the .onnx file to run
+        """
+        if not path.endswith(".onnx"):
+            onnx_path = os.path.splitext(path)[0] + ".onnx"
+            if not os.path.isfile(onnx_path):
+                # Dynamic axes so the batch scheduler can send any batch size
+                onnx_path = YOLO(path).export(format="onnx", imgsz=self.imgsz, dynamic=True)
+            path = onnx_path
+        if self.int8 and not path.endswith(".int8.onnx"):
+            int8_path = path[:-len(".onnx")] + ".int8.onnx"
+            if not os.path.isfile(int8_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8)
+            path = int8_path
+        return path
+
+    def load(self, path: str):
+        return YOLO(self.prepare(path)), "cpu"
+
+
+class OpenVinoBackend:
+    """Runs an exported OpenVINO model on the CPU, with the ultralytics
+    pre / post-processing around it. A .pt path is exported
+    to a <name>_openvino_model directory on first load.
+    """
+    name = "openvino"
+
+    def __init__(self, int8: bool = INT8, imgsz: int = IMGSZ, data: str = INT8_DATA):
+        self.int8 = int8
+        self.imgsz = imgsz
+        self.data = data
+
+    def prepare(self, path: str) -> str:
+        """Exports the weights if needed
+
+        Arguments:
+            path (str): Path to .pt weights or an exported model directory
+
+        Returns:
+            path (str): Path to the OpenVINO model directory to run
+        """
+        if os.path.isdir(path):
+            return path
+        suffix = "_int8_openvino_model" if self.int8 else "_openvino_model"
+        model_dir = os.path.splitext(path)[0] + suffix
+        if not os.path.isdir(model_dir):
+            kwargs = {"format": "openvino", "imgsz": self.imgsz, "dynamic": True}
+            if self.int8:
+                # INT8 needs calibration images, ultralytics defaults to a dataset download otherwise
+                kwargs.update(int8=True, **({"data": self.data} if self.data else {}))
+            model_dir = YOLO(path).export(**kwargs)
+        return model_dir
+
+    def load(self, path: str):
+        return YOLO(self.prepare(path)), "cpu"
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxBackend.name: OnnxBackend,
+    OpenVinoBackend.name: OpenVinoBackend,
+}
+
+
+def get_backend(name: str = None, serving_mode: str = None):
+    """Builds the inference backend selected by YOLO_BACKEND
+
+    Arguments:
+        name (str): torch, onnx or openvino, defaults to YOLO_BACKEND
+        serving_mode (str): inline runs the model in this process, process
+            runs it in the pool of detectors.process_pool. Defaults to YOLO_SERVING_MODE
+
+    Returns:
+        backend (TorchBackend | OnnxBackend | OpenVinoBackend | ProcessPoolBackend): The backend
+    """
+    name = name or BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown YOLO backend: {name}")
+    if (serving_mode or SERVING_MODE) == "process":
+        from detectors.process_pool import ProcessPoolBackend
+        return ProcessPoolBackend(backend_name=name)
+    return BACKENDS[name]()
@@ -0,0 +1,178 @@
+# For the scheduler loop and the futures handed back to requests
+import asyncio
+# For the batch size histogram
+from collections import Counter
+# For running the model without blocking the event loop
+from concurrent.futures import ThreadPoolExecutor
+# For environment variables
+import os
+
+
+class BatchScheduler:
+    """Collects images submitted by concurrent requests and scores them
+    with one batched model call. A batch is flushed once it holds
+    `max_batch_size` images or the first image has waited `max_wait_ms`.
+    """
+    MAX_BATCH_SIZE = int(os.environ.get("YOLO_BATCH_MAX_SIZE", "8"))  # Images per model call
+    MAX_WAIT_MS = float(os.environ.get("YOLO_BATCH_WAIT_MS", "10"))  # Wait window of a batch
+    # Batches scored at the same time. Keep 1 for an in-process model, which
+    # is not thread-safe; set it to YOLO_INFERENCE_PROCESSES in process mode
+    CONCURRENCY = int(os.environ.get("YOLO_BATCH_CONCURRENCY", "1"))
+
+    def __init__(self, runner, max_batch_size: int = None, max_wait_ms: float = None, concurrency: int = None):
+        """Creates a scheduler. The loop is started by `start`, usually
+        from the FastAPI lifespan, or lazily by the first `submit`.
+
+        Arguments:
+            runner (callable): Takes a list of frames and returns one result per frame
+            max_batch_size (int): Flush a batch once it holds this many images
+            max_wait_ms (float): Flush a batch once its first image waited this long
+            concurrency (int): How many batches may be scored at the same time,
+                e.g. one per inference process
+        """
+        self._runner = runner
+        self.max_batch_size = max_batch_size or BatchScheduler.MAX_BATCH_SIZE
+        if max_wait_ms is None:
+            max_wait_ms = BatchScheduler.MAX_WAIT_MS
+        self.max_wait = max_wait_ms / 1000
+        self.concurrency = concurrency or BatchScheduler.CONCURRENCY
+        self._queue = None
+        self._task = None
+        self._running = set()
+        # The batch being collected or waiting for a slot, until a _score task owns it
+        self._pending = []
+        # One thread per batch in flight; a single in-process model runs them one after another
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="yolo-batch")
+        self.batches = 0
+        self.images = 0
+        self.last_batch_size = 0
+        self.batch_sizes = Counter()
+
+    def start(self):
+        """Starts the scheduler loop on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stops the scheduler loop and fails the images still waiting"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Taken off the queue but not handed to a _score task yet
+        pending, self._pending = self._pending, []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+        # Let the cancelled batches fail their requests before returning
+        await asyncio.gather(*running, return_exceptions=True)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    async def submit(self, frame):
+        """Queues a single frame and waits for its result
+
+        Arguments:
+            frame (numpy.ndarray): The decoded image
+
+        Returns:
+            result (ultralytics.engine.results.Results): The result of that frame
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((frame, future))
+        return await future
+
+    async def _collect(self):
+        """Waits for the first image, then gathers more until the batch
+        is full or the wait window has passed.
+
+        Returns:
+            batch (list(tuple)): The queued (frame, future) pairs
+        """
+        loop = asyncio.get_running_loop()
+        # Kept on self so stop() can fail it if the loop is cancelled before scoring it
+        self._pending = batch = []
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            batch = [(frame, future) for frame, future in await self._collect() if not future.done()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.images += len(batch)
+            self.last_batch_size = len(batch)
+            self.batch_sizes[len(batch)] += 1
+            await slots.acquire()
+            task = loop.create_task(self._score(batch))
+            self._pending = []
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _score(self, batch):
+        loop = asyncio.get_running_loop()
+        frames = [frame for frame, _ in batch]
+        try:
+            results = await loop.run_in_executor(self._executor, self._runner, frames)
+        except asyncio.CancelledError:
+            # Cancelled by stop(): fail the requests of this batch instead of leaving them waiting
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch scheduler stopped"))
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Returns the queue depth and batch size metrics
+
+        Returns:
+            stats (dict): Current queue depth and batch size counters
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "concurrency": self.concurrency,
+            "in_flight": len(self._running),
+            "batches": self.batches,
+            "images": self.images,
+            "last_batch_size": self.last_batch_size,
+            "avg_batch_size": self.images / self.batches if self.batches else 0.0,
+            "batch_sizes": dict(self.batch_sizes),
+        }
@@ -0,0 +1,146 @@
+# For the overall download deadline
+import asyncio
+# For environment variables
+import os
+# For downloading images without blocking the event loop
+import httpx
+
+MAX_BYTES = int(os.environ.get("YOLO_DOWNLOAD_MAX_BYTES", str(20 * 1024 * 1024)))  # Largest image accepted
+TIMEOUT = float(os.environ.get("YOLO_DOWNLOAD_TIMEOUT", "10"))  # Whole download, headers to last byte
+CONNECT_TIMEOUT = float(os.environ.get("YOLO_DOWNLOAD_CONNECT_TIMEOUT", "3"))
+MAX_CONNECTIONS = int(os.environ.get("YOLO_DOWNLOAD_MAX_CONNECTIONS", "32"))  # Pooled per worker
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the formats cv2 can decode
+_SIGNATURES = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"GIF8",  # GIF
+    b"BM",  # BMP
+    b"II*\x00",  # TIFF, little endian
+    b"MM\x00*",  # TIFF, big endian
+)
+
+
+class DownloadError(Exception):
+    """A download that was refused or failed, with the HTTP status to report"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def looks_like_image(head: bytes) -> bool:
+    """Checks the first bytes of a body against known image signatures
+
+    Arguments:
+        head (bytes): The start of the body, at least 12 bytes when available
+
+    Returns:
+        is_image (bool): Whether the body starts like an image cv2 can decode
+    """
+    if head.startswith(_SIGNATURES):
+        return True
+    # WEBP is a RIFF container: RIFF <size> WEBP
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+async def read_upload(file, max_bytes: int = MAX_BYTES) -> bytes:
+    """Reads a multipart upload with the same limits as a download: at
+    most `max_bytes`, and it has to start like an image
+
+    Arguments:
+        file (fastapi.UploadFile): The uploaded file
+        max_bytes (int): Largest body accepted
+
+    Returns:
+        contents (bytes): The encoded image
+    """
+    body = bytearray()
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        body += chunk
+        if len(body) > max_bytes:
+            raise DownloadError(413, f"Image is larger than {max_bytes} bytes")
+    if not looks_like_image(bytes(body[:12])):
+        raise DownloadError(415, "Not an image")
+    return bytes(body)
+
+
+class ImageDownloader:
+    """Downloads images over a pooled HTTP client shared by every request
+    of the worker. The body is streamed in chunks and the download is
+    aborted as soon as it turns out not to be an acceptable image: an
+    error status, a non-image content type or signature, or more than
+    `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES, timeout: float = TIMEOUT,
+                 connect_timeout: float = CONNECT_TIMEOUT, max_connections: int = MAX_CONNECTIONS):
+        """Creates the downloader and its connection pool
+
+        Arguments:
+            max_bytes (int): Largest body accepted
+            timeout (float): Seconds the whole download may take
+            connect_timeout (float): Seconds to establish a connection
+            max_connections (int): Connections kept by the pool
+        """
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+        )
+
+    async def fetch(self, url: str) -> bytes:
+        """Downloads an image
+
+        Arguments:
+            url (str): The image URL
+
+        Returns:
+            contents (bytes): The encoded image
+        """
+        try:
+            return await asyncio.wait_for(self._fetch(url), self.timeout)
+        except asyncio.TimeoutError:
+            raise DownloadError(504, "Image download timed out")
+        except (httpx.InvalidURL, httpx.UnsupportedProtocol):
+            raise DownloadError(400, "Invalid image URL")
+        except httpx.TimeoutException:
+            raise DownloadError(504, "Image download timed out")
+        except httpx.HTTPError as e:
+            raise DownloadError(502, f"Image download failed: {e}")
+
+    async def _fetch(self, url: str) -> bytes:
+        async with self.client.stream("GET", url) as response:
+            if response.status_code >= 400:
+                raise DownloadError(502, f"Image download failed with status {response.status_code}")
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith("image/") and content_type != "application/octet-stream":
+                raise DownloadError(415, f"Not an image: {content_type}")
+            length = response.headers.get("content-length")
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                raise DownloadError(413, f"Image is larger than {self.max_bytes} bytes")
+
+            body = bytearray()
+            checked = False
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                body += chunk
+                if len(body) > self.max_bytes:
+                    raise DownloadError(413, f"Image is larger than {self.max_bytes} bytes")
+                if not checked and len(body) >= 12:
+                    # Content types are often generic or wrong, the signature is not
+                    if not looks_like_image(bytes(body[:12])):
+                        raise DownloadError(415, "Not an image")
+                    checked = True
+            if not checked and not looks_like_image(bytes(body)):
+                raise DownloadError(415, "Not an image")
+            return bytes(body)
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,25 @@
+# For running blocking work away from the event loop
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+# For environment variables
+import os
+
+# Bounded pool for the CPU-bound stages (decode, plot, encode).
+# OpenCV and numpy release the GIL, so threads run them in parallel.
+CPU_WORKERS = int(os.environ.get("YOLO_CPU_WORKERS", str(os.cpu_count() or 2)))
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="yolo-cpu")
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Runs a CPU-bound function on the bounded pool and waits for it
+
+    Arguments:
+        func (callable): The blocking function to run
+        *args, **kwargs: Passed through to the function
+
+    Returns:
+        result: Whatever the function returned
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
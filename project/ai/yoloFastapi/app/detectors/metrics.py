@@ -0,0 +1,108 @@
+# For per-request stage timings that follow the request across awaits
+import contextvars
+from contextlib import contextmanager
+# For the slow request log line
+import json
+import time
+# For environment variables
+import os
+# For exporting the timings to Prometheus
+from prometheus_client import REGISTRY, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+SLOW_REQUEST_MS = float(os.environ.get("YOLO_SLOW_REQUEST_MS", "1000"))  # Log the stage breakdown of slower requests
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stages: download, decode, cache (hashing), inference (queue wait + forward), forward (one batched
+# model call), plot, encode, store, upload, render. Metrics are per worker process.
+STAGE_SECONDS = Histogram("yolo_stage_seconds", "Time spent in each stage of an analysis",
+                          ["stage"], buckets=STAGE_BUCKETS)
+REQUEST_SECONDS = Histogram("yolo_request_seconds", "Time spent analyzing one image",
+                            ["endpoint"], buckets=STAGE_BUCKETS)
+MODEL_LOAD_SECONDS = Histogram("yolo_model_load_seconds", "Time spent loading a weights file",
+                               ["backend"], buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+
+# The stage timings of the request being served, None outside of `track_request`
+_timings = contextvars.ContextVar("yolo_stage_timings", default=None)
+
+
+@contextmanager
+def timed(stage: str):
+    """Times a block as one stage. Around an await the time includes
+    waiting for the executor or the batch scheduler, which is what the
+    request actually pays.
+
+    Arguments:
+        stage (str): The stage label, e.g. decode
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def track_request(endpoint: str):
+    """Collects the stage timings of one request and prints them as a
+    JSON line when the request takes longer than YOLO_SLOW_REQUEST_MS
+
+    Arguments:
+        endpoint (str): The endpoint label, e.g. image
+
+    Returns:
+        timings (dict): Seconds spent in each stage so far
+    """
+    timings = {}
+    token = _timings.set(timings)
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+        elapsed = time.perf_counter() - start
+        REQUEST_SECONDS.labels(endpoint).observe(elapsed)
+        if elapsed * 1000 >= SLOW_REQUEST_MS:
+            print(json.dumps({
+                "event": "slow_request",
+                "endpoint": endpoint,
+                "total_ms": round(elapsed * 1000, 1),
+                "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()},
+            }))
+
+
+class StatsCollector:
+    """Exports the `stats()` dict of a component at scrape time, so
+    gauges such as the queue depth are never stale.
+    """
+
+    def __init__(self, prefix: str, stats, gauges=(), counters=()):
+        """Creates the collector. Register it with `register_stats`.
+
+        Arguments:
+            prefix (str): Prepended to every metric name
+            stats (callable): Returns the current stats dict
+            gauges (iterable(str)): Keys exported as gauges
+            counters (iterable(str)): Keys exported as counters
+        """
+        self.prefix = prefix
+        self._stats = stats
+        self.gauges = tuple(gauges)
+        self.counters = tuple(counters)
+
+    def collect(self):
+        stats = self._stats()
+        for key in self.gauges:
+            yield GaugeMetricFamily(f"{self.prefix}_{key}", key.replace("_", " "), value=stats[key])
+        for key in self.counters:
+            yield CounterMetricFamily(f"{self.prefix}_{key}", key.replace("_", " "), value=stats[key])
+
+
+def register_stats(prefix: str, stats, gauges=(), counters=()):
+    """Exports the stats of a component on the default registry"""
+    REGISTRY.register(StatsCollector(prefix, stats, gauges, counters))
@@ -0,0 +1,108 @@
+# For reading the image size from the header only
+import io
+from PIL import Image
+# For array computations
+import numpy as np
+# For image decoding / editing
+import cv2
+# For environment variables
+import os
+
+MAX_EDGE = int(os.environ.get("YOLO_MAX_EDGE", "1280"))  # Long edge cap of decoded frames
+OUTPUT_FORMAT = os.environ.get("YOLO_OUTPUT_FORMAT", "jpeg").lower()  # jpeg or webp
+OUTPUT_QUALITY = int(os.environ.get("YOLO_OUTPUT_QUALITY", "85"))
+
+# Reduced decode flags by scale factor, largest first
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", "image/png", None),
+}
+
+
+def _header_size(data: bytes):
+    """Reads width and height from the image header without decoding
+
+    Returns:
+        size (tuple(int, int) | None): (width, height), None when unreadable
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def decode_flag(size, max_edge: int = MAX_EDGE) -> int:
+    """Picks the largest reduced decode scale that still leaves the long
+    edge at or above `max_edge`
+
+    Arguments:
+        size (tuple(int, int) | None): (width, height) of the encoded image
+        max_edge (int): The long edge the frame is capped to
+
+    Returns:
+        flag (int): The cv2.imdecode flag to use
+    """
+    if size is None:
+        return cv2.IMREAD_COLOR
+    long_edge = max(size)
+    for scale, flag in _REDUCED_FLAGS:
+        if long_edge // scale >= max_edge:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(data: bytes, max_edge: int = MAX_EDGE):
+    """Decodes an encoded image into a BGR frame at reduced scale,
+    applies its EXIF orientation and caps its long edge
+
+    Arguments:
+        data (bytes): The encoded image
+        max_edge (int): The long edge cap
+
+    Returns:
+        img (numpy.ndarray | None): The decoded frame, None when undecodable
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    # Color flags (unlike -1 / IMREAD_UNCHANGED) apply the EXIF orientation
+    img = cv2.imdecode(arr, decode_flag(_header_size(data), max_edge))
+    if img is None:
+        return None
+    height, width = img.shape[:2]
+    long_edge = max(height, width)
+    if long_edge > max_edge:
+        scale = max_edge / long_edge
+        img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return img
+
+
+def output_extension(fmt: str = OUTPUT_FORMAT) -> str:
+    return _FORMATS[fmt][0]
+
+
+def output_media_type(fmt: str = OUTPUT_FORMAT) -> str:
+    return _FORMATS[fmt][1]
+
+
+def encode_image(frame, fmt: str = OUTPUT_FORMAT, quality: int = OUTPUT_QUALITY):
+    """Encodes an annotated frame in the configured output format
+
+    Arguments:
+        frame (numpy.ndarray): The frame to encode
+        fmt (str): jpeg, webp or png
+        quality (int): Quality for jpeg / webp
+
+    Returns:
+        success (bool): Whether encoding succeeded
+        buffer (numpy.ndarray): The encoded bytes
+    """
+    ext, _, quality_flag = _FORMATS[fmt]
+    params = [quality_flag, quality] if quality_flag is not None else []
+    return cv2.imencode(ext, frame, params)
@@ -0,0 +1,137 @@
+# For the model-owning processes
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+# For handing frames to the processes without pickling them
+from multiprocessing import shared_memory
+# For environment variables
+import os
+# For array computations
+import numpy as np
+# For moving results between the processes as plain arrays
+from detectors.result_arrays import from_arrays, to_arrays
+
+PROCESSES = int(os.environ.get("YOLO_INFERENCE_PROCESSES", "2"))  # Model-owning processes
+TORCH_THREADS = int(os.environ.get("YOLO_TORCH_THREADS", "0"))  # torch.set_num_threads per process, 0 keeps the default
+
+# The model of this process, set by _init_worker
+_model = None
+
+
+def _init_worker(path: str, threads: int, backend_name: str):
+    """Loads and warms up the model once when an inference process starts"""
+    global _model
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+    from detectors.backends import get_backend
+    from detectors.registry import warm_up
+    _model, _ = get_backend(backend_name, serving_mode="inline").load(path)
+    # Every process warms its own copy; a call through the pool only reaches one of them
+    warm_up(_model)
+
+
+def _worker_names():
+    return dict(_model.names)
+
+
+def _attach(name: str):
+    # Spawned processes share the resource tracker of the HTTP worker, which
+    # created the block and unlinks it, so attaching needs no bookkeeping here
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker_predict(frames: list, kwargs: dict):
+    """Scores frames that live in shared memory
+
+    Arguments:
+        frames (list(tuple)): (shared memory name, shape, dtype) of each frame
+        kwargs (dict): Passed through to the model call
+
+    Returns:
+        outputs (list(dict)): The boxes / probs arrays of each frame
+    """
+    blocks = [_attach(name) for name, _, _ in frames]
+    try:
+        images = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+                  for shm, (_, shape, dtype) in zip(blocks, frames)]
+        results = _model(images, **{"verbose": False, **kwargs})
+        outputs = [to_arrays(r) for r in results]
+        # Drop the views before closing the blocks they point into
+        del images, results
+        return outputs
+    finally:
+        for shm in blocks:
+            shm.close()
+
+
+def _to_shared(frame: np.ndarray):
+    shm = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+    np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+    return shm
+
+
+class ProcessPoolModel:
+    """Stands in for a YOLO model in the HTTP worker and runs every call
+    in a fixed pool of processes that each own a copy of the model.
+    Frames are copied once into shared memory; only the small box /
+    probability arrays come back through pickling. The HTTP worker still
+    imports torch and ultralytics, since it rebuilds and plots the
+    Results; what it no longer holds is the model and its forward pass.
+    """
+
+    def __init__(self, path: str, processes: int = PROCESSES, threads: int = TORCH_THREADS,
+                 backend_name: str = None):
+        """Starts the processes and waits until their model is loaded
+
+        Arguments:
+            path (str): Path to the weights file
+            processes (int): Number of model-owning processes
+            threads (int): torch.set_num_threads of each process, 0 keeps the default
+            backend_name (str): Backend the processes run, defaults to YOLO_BACKEND
+        """
+        self._executor = ProcessPoolExecutor(max_workers=processes,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker,
+                                             initargs=(path, threads, backend_name))
+        self.processes = processes
+        self.names = self._executor.submit(_worker_names).result()
+
+    def __call__(self, frames, **kwargs):
+        """Scores frames like `YOLO.__call__`
+
+        Arguments:
+            frames (list(numpy.ndarray)): The decoded images
+            **kwargs: Passed through to the model call, e.g. conf
+
+        Returns:
+            results (list(ultralytics.engine.results.Results)): One result per frame, in order
+        """
+        frames = [np.ascontiguousarray(frame) for frame in frames]
+        blocks = [_to_shared(frame) for frame in frames]
+        try:
+            specs = [(shm.name, frame.shape, frame.dtype.str) for shm, frame in zip(blocks, frames)]
+            outputs = self._executor.submit(_worker_predict, specs, kwargs).result()
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+        return [from_arrays(frame, self.names, **out) for frame, out in zip(frames, outputs)]
+
+    def close(self):
+        """Stops the processes once the calls already submitted are done"""
+        self._executor.shutdown(wait=False)
+
+
+class ProcessPoolBackend:
+    """Runs the backend selected by YOLO_BACKEND in a pool of processes,
+    keeping the HTTP worker free of the model.
+    """
+    name = "process"
+
+    def __init__(self, processes: int = PROCESSES, threads: int = TORCH_THREADS, backend_name: str = None):
+        self.processes = processes
+        self.threads = threads
+        self.backend_name = backend_name
+
+    def load(self, path: str):
+        return ProcessPoolModel(path, self.processes, self.threads, self.backend_name), "process"
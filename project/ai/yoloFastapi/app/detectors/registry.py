@@ -0,0 +1,111 @@
+# For guarding model swaps between requests
+import threading
+# For environment variables
+import os
+# For the synthetic warmup frame
+import numpy as np
+# For timing model loads
+import time
+# How the weights are run (PyTorch, ONNX Runtime, OpenVINO)
+from detectors.backends import IMGSZ, get_backend
+# For the model load time metric
+from detectors.metrics import MODEL_LOAD_SECONDS, timed
+# Results computed by the previous model are dropped on a swap
+from stores.results import result_cache
+
+WARMUP_RUNS = int(os.environ.get("YOLO_WARMUP_RUNS", "1"))  # Synthetic inferences before a model serves, 0 disables
+
+
+def warm_up(model, runs: int = WARMUP_RUNS, imgsz: int = IMGSZ):
+    """Runs synthetic inferences so the first request does not pay for
+    lazy initialization: graph / kernel setup of the forward pass and the
+    font loading of the first plot.
+
+    Arguments:
+        model (Model): The loaded model
+        runs (int): Number of inferences, 0 skips the warmup
+        imgsz (int): Edge of the synthetic square frame
+    """
+    frame = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(runs):
+        with timed("warmup"):
+            results = model([frame], verbose=False)
+            results[0].plot()
+
+
+class ModelRegistry:
+    """Holds the YOLO model, its device and class names so that every
+    request served by a worker shares a single loaded copy.
+    """
+
+    def __init__(self, path: str = None, backend=None):
+        """Creates an empty registry. The model is loaded by `load`,
+        usually from the FastAPI lifespan, or lazily by `get`.
+
+        Arguments:
+            path (str): Path to the weights file, defaults to YOLO_WEIGHTS_PATH
+            backend: The inference backend, defaults to the one selected by YOLO_BACKEND
+        """
+        self.path = path or os.environ.get("YOLO_WEIGHTS_PATH", "yolocls.pt")
+        self.backend = backend or get_backend()
+        self.model = None
+        self.device = None
+        self.classes = {}
+        self._lock = threading.RLock()
+
+    def load(self, path: str = None, warmup: bool = True):
+        """Loads a weights file and makes it the shared model. The model
+        is warmed up before it is swapped in, so a hot swap never serves
+        a cold model. Requests already running keep the model object they
+        started with. Cached results of the previous model are cleared.
+
+        Arguments:
+            path (str): Path to the weights file, defaults to the current path
+            warmup (bool): Run `warm_up` before swapping the model in
+
+        Returns:
+            model (Model): The loaded model
+        """
+        with self._lock:
+            path = path or self.path
+            start = time.perf_counter()
+            model, device = self.backend.load(path)
+            MODEL_LOAD_SECONDS.labels(self.backend.name).observe(time.perf_counter() - start)
+            if warmup:
+                warm_up(model)
+            old = self.model
+            self.path = path
+            self.model = model
+            self.device = device
+            self.classes = model.names
+        result_cache.clear()
+        if hasattr(old, "close"):
+            old.close()
+        return model
+
+    def close(self):
+        """Releases the model, stopping its processes in process serving mode"""
+        with self._lock:
+            model, self.model = self.model, None
+        if hasattr(model, "close"):
+            model.close()
+
+    def get(self):
+        """Returns the shared model, loading it first if the lifespan
+        has not done so yet.
+
+        Returns:
+            model (Model): The loaded model
+        """
+        model = self.model
+        if model is None:
+            with self._lock:
+                model = self.model if self.model is not None else self.load()
+        return model
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+
+registry = ModelRegistry()
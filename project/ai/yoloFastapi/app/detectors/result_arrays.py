@@ -0,0 +1,43 @@
+# For array computations
+import numpy as np
+# For handing the arrays back to ultralytics as tensors
+import torch
+# For rebuilding results from plain arrays
+from ultralytics.engine.results import Results
+
+
+def to_arrays(result) -> dict:
+    """Extracts what is needed to rebuild a result elsewhere, e.g. in
+    another process or another worker
+
+    Arguments:
+        result (ultralytics.engine.results.Results): The result to convert
+
+    Returns:
+        arrays (dict): The boxes / probs arrays, None when the result has none
+    """
+    return {
+        "boxes": result.boxes.data.cpu().numpy() if result.boxes is not None else None,
+        "probs": result.probs.data.cpu().numpy() if result.probs is not None else None,
+    }
+
+
+def _tensor(array):
+    return torch.from_numpy(np.ascontiguousarray(array)) if array is not None else None
+
+
+def from_arrays(frame: np.ndarray, names: dict, boxes=None, probs=None) -> Results:
+    """Rebuilds a result from `to_arrays` output. Boxes / Probs keep what
+    they are given, so the arrays are wrapped as tensors like the result
+    of an inline model call.
+
+    Arguments:
+        frame (numpy.ndarray): The decoded image the result belongs to
+        names (dict): Class id to name of the model
+        boxes (numpy.ndarray): The boxes array, None for classification models
+        probs (numpy.ndarray): The class probabilities, None for detection models
+
+    Returns:
+        result (ultralytics.engine.results.Results): The rebuilt result
+    """
+    return Results(frame, path="", names=names, boxes=_tensor(boxes), probs=_tensor(probs))
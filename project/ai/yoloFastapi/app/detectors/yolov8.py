@@ -1,78 +1,101 @@
-# For machine learning
-import torch
 # For array computations
 import numpy as np
-# For image decoding / editing
-import cv2
+# For image decoding
+from detectors.preprocess import decode_image
 # For environment variables
 import os
-# For detecting which ML Devices we can use
-import platform
-# For actually using the YOLO models
-from ultralytics import YOLO
+# The model shared by every request on this worker
+from detectors.registry import registry as default_registry
+# For scoring concurrent requests in one model call
+from detectors.batching import BatchScheduler
+# For keeping decode / plot off the event loop
+from detectors.executor import run_cpu
+# For the per-stage timings
+from detectors.metrics import timed
 
 
 class YoloV8ImageObjectDetection:
-    PATH = os.environ.get("YOLO_WEIGHTS_PATH",
-                          "yolocls.pt")  # Path to a model. yolov8n.pt means download from PyTorch Hub
     CONF_THRESH = float(os.environ.get("YOLO_CONF_THRESHOLD", "0.70"))  # Confidence threshold
+    TOP_K = int(os.environ.get("YOLO_TOP_K", "5"))  # Ranked classes returned per image
+    TEMPERATURE = float(os.environ.get("YOLO_CALIBRATION_TEMPERATURE", "1.0"))  # Fitted on a validation set
 
-    def __init__(self, chunked: bytes = None):
+    def __init__(self, chunked: bytes = None, registry=None, scheduler=None):
         """Initializes a yolov8 detector with a binary image
 
         Arguments:
             chunked (bytes): A binary image representation
+            registry (ModelRegistry): Where the shared model is loaded, defaults to the worker registry
+            scheduler (BatchScheduler): Batches frames with other requests, defaults to the worker scheduler
         """
         self._bytes = chunked
-        self.model = self._load_model()
-        self.device = self._get_device()
+        self.scheduler = scheduler or default_scheduler
+        registry = registry or default_registry
+        self.model = registry.get()
+        self.device = registry.device
         self.classes = self.model.names
 
-    def _get_device(self):
-        """Gets best device for your system
+    async def __call__(self):
+        """This function is called when class is executed.
+        It analyzes a single image passed to its constructor
+        and returns the annotated image and its labels
 
         Returns:
-            device (str): The device to use for YOLO for your system
+            frame (numpy.ndarray): Frame with bounding boxes and labels ploted on it.
+            labels (list(str)): The corresponding labels that were found
         """
-        if platform.system().lower() == "darwin":
-            return "mps"
-        if torch.cuda.is_available():
-            return "cuda"
-        return "cpu"
+        frame = await self.decode()
+        frame, labels, _ = await self.detect(frame)
+        return frame, labels
 
-    def _load_model(self):
-        """Loads Yolo8 model from pytorch hub or a path on disk
+    async def decode(self):
+        """Decodes the image passed to the constructor off the event loop
 
         Returns:
-            model (Model) - Trained Pytorch model
+            frame (numpy.ndarray): The decoded image
         """
-        model = YOLO(YoloV8ImageObjectDetection.PATH)
-        return model
+        with timed("decode"):
+            return await run_cpu(self._get_image_from_chunked)
 
-    async def __call__(self):
-        """This function is called when class is executed.
-        It analyzes a single image passed to its constructor
-        and returns the annotated image and its labels
+    async def detect(self, frame):
+        """Scores a decoded image and plots its boxes
+
+        Arguments:
+            frame (numpy.ndarray): The decoded image
 
         Returns:
             frame (numpy.ndarray): Frame with bounding boxes and labels ploted on it.
-            labels (list(str)): The corresponding labels that were found
+            labels (set(str)): The corresponding labels that were found
+            result (ultralytics.engine.results.Results): The raw result of the frame
         """
-        frame = self._get_image_from_chunked()
-        results = self.score_frame(frame)
-        frame, labels = self.plot_boxes(results, frame)
-        return frame, set(labels)
+        with timed("inference"):
+            results = [await self.scheduler.submit(frame)]
+        with timed("plot"):
+            frame, labels = await run_cpu(self.plot_boxes, results, frame)
+        return frame, set(labels), results[0]
+
+    async def detect_labels(self, frame):
+        """Scores a decoded image without plotting, for callers that only
+        need the labels. The result can be rendered later with `render`.
+
+        Arguments:
+            frame (numpy.ndarray): The decoded image
+
+        Returns:
+            result (ultralytics.engine.results.Results): The raw result of the frame
+            labels (set(str)): The corresponding labels that were found
+        """
+        with timed("inference"):
+            result = await self.scheduler.submit(frame)
+        return result, set(self.get_labels([result]))
 
     def _get_image_from_chunked(self):
         """Loads an openCV image from the raw image bytes passed by
-        the API.
+        the API, decoded at reduced scale with the EXIF orientation applied.
 
         Returns:
             img (numpy.ndarray): opencv2 image object from the raw binary
         """
-        arr = np.asarray(bytearray(self._bytes), dtype=np.uint8)
-        img = cv2.imdecode(arr, -1)  # 'Load it as it is'
-        return img
+        return decode_image(self._bytes)
 
     def score_frame(self, frame):
         """Scores a single image with a YoloV8 model
@@ -83,14 +106,7 @@ class YoloV8ImageObjectDetection:
         Returns:
             results list(ultralytics.engine.results.Results)): Labels and Coordinates of objects detected by model in the frame.
         """
-        self.model.to(self.device)
-        frame = [frame]
-        results = self.model(
-            frame,
-            conf=YoloV8ImageObjectDetection.CONF_THRESH,
-            save_conf=True
-        )
-        return results
+        return score_frames([frame], self.model)
 
     def class_to_label(self, x):
         """For a given label value, return corresponding string label.
@@ -114,12 +130,131 @@ class YoloV8ImageObjectDetection:
             frame (numpy.ndarray): Frame with bounding boxes and labels ploted on it.
             labels (list(str)): The corresponding labels that were found
         """
+        labels = self.get_labels(results)
+        frame = render(results[0])
+        return frame, labels
+
+    def top_k(self, result, k: int = None):
+        """Ranks the classes of a result by calibrated confidence.
+        Detection results keep the best box confidence of each class,
+        classification results use the class probabilities. Both are
+        computed on the whole tensors at once.
+
+        Arguments:
+            result (ultralytics.engine.results.Results): The result to rank
+            k (int): How many classes to return, defaults to YOLO_TOP_K
+
+        Returns:
+            ranked (list(tuple(int, str, float))): (class id, name, confidence), best first
+        """
+        k = k or YoloV8ImageObjectDetection.TOP_K
+        n_classes = len(self.classes)
+        if getattr(result, "probs", None) is not None:
+            probs = _to_numpy(result.probs.data).astype(np.float64)
+            scores = calibrate_probs(probs, YoloV8ImageObjectDetection.TEMPERATURE)
+        elif result.boxes is not None and len(result.boxes):
+            cls = _to_numpy(result.boxes.cls).astype(np.int64)
+            conf = calibrate_conf(_to_numpy(result.boxes.conf).astype(np.float64),
+                                  YoloV8ImageObjectDetection.TEMPERATURE)
+            scores = np.zeros(n_classes, dtype=np.float64)
+            np.maximum.at(scores, cls, conf)
+        else:
+            return []
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(c), self.classes[int(c)], float(scores[c])) for c in top]
+
+    def get_labels(self, results):
+        """Collects the class names of the boxes of the last result
+
+        Arguments:
+            results (list(ultralytics.engine.results.Results)): contains labels and coordinates predicted by model.
+
+        Returns:
+            labels (list(str)): The corresponding labels that were found
+        """
         for r in results:
             boxes = r.boxes
             labels = []
             for box in boxes:
                 c = box.cls
-                l = self.model.names[int(c)]
+                l = self.classes[int(c)]
                 labels.append(l)
-        frame = results[0].plot()
-        return frame, labels
\ No newline at end of file
+        return labels
+
+
+def _to_numpy(x) -> np.ndarray:
+    # Results rebuilt from arrays may hold numpy arrays instead of tensors
+    return np.asarray(x.cpu() if hasattr(x, "cpu") else x)
+
+
+def calibrate_conf(conf, temperature: float):
+    """Temperature-scales sigmoid confidences: sigmoid(logit(p) / T)
+
+    Arguments:
+        conf (numpy.ndarray): Box confidences in (0, 1)
+        temperature (float): T > 1 softens, T < 1 sharpens, 1 is the identity
+
+    Returns:
+        conf (numpy.ndarray): The calibrated confidences
+    """
+    if temperature == 1.0:
+        return conf
+    conf = np.clip(conf, 1e-7, 1 - 1e-7)
+    return 1 / (1 + np.exp(-np.log(conf / (1 - conf)) / temperature))
+
+
+def calibrate_probs(probs, temperature: float):
+    """Temperature-scales softmax probabilities: softmax(log(p) / T)
+
+    Arguments:
+        probs (numpy.ndarray): Class probabilities summing to 1
+        temperature (float): T > 1 softens, T < 1 sharpens, 1 is the identity
+
+    Returns:
+        probs (numpy.ndarray): The calibrated probabilities
+    """
+    if temperature == 1.0:
+        return probs
+    logits = np.log(np.clip(probs, 1e-12, None)) / temperature
+    logits -= logits.max()
+    exp = np.exp(logits)
+    return exp / exp.sum()
+
+
+def render(result):
+    """Plots the bounding boxes and labels of a result on its own frame
+
+    Arguments:
+        result (ultralytics.engine.results.Results): The result to render
+
+    Returns:
+        frame (numpy.ndarray): Frame with bounding boxes and labels ploted on it.
+    """
+    return result.plot()
+
+
+def score_frames(frames, model=None):
+    """Scores a batch of images with a single YoloV8 model call
+
+    Arguments:
+        frames (list(numpy.ndarray)): input frames in numpy format.
+        model (Model): The model to use, defaults to the worker registry model
+
+    Returns:
+        results list(ultralytics.engine.results.Results)): One result per frame, in order.
+    """
+    if model is None:
+        model = default_registry.get()
+    with timed("forward"):
+        return model(
+            frames,
+            conf=YoloV8ImageObjectDetection.CONF_THRESH,
+            save_conf=True
+        )
+
+
+default_scheduler = BatchScheduler(score_frames)
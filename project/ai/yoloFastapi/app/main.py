@@ -1,9 +1,35 @@
+from contextlib import asynccontextmanager
 from uvicorn import Server, Config
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 import os
-from routers import yolo
-app = FastAPI()
+from routers import yolo, admin, metrics, health
+from detectors.registry import registry
+from detectors.yolov8 import default_scheduler
+from database.nutrition import nutrition_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per gunicorn worker, so every request shares one loaded model.
+    # Loading also runs the warmup inference, so the worker starts serving warm
+    app.state.ready = False
+    registry.load()
+    try:
+        nutrition_index.load()
+    except Exception as e:
+        # Inference still works, responses just carry no nutrition facts until a reload
+        print(f"Failed to load nutritions: {e}")
+    default_scheduler.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await default_scheduler.stop()
+    await yolo.downloader.aclose()
+    registry.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +40,9 @@ app.add_middleware(
 )
 
 app.include_router(yolo.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 80))
@@ -0,0 +1,82 @@
+# For API operations and standards
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+# For environment variables
+import os
+# The model shared by every request on this worker
+from detectors.registry import registry
+from detectors.yolov8 import default_scheduler
+from database.nutrition import nutrition_index
+from stores.results import result_cache
+# For response schemas
+from schemas.admin import ModelInfoResponse, BatchingStatsResponse, NutritionReloadResponse, CacheStatsResponse
+
+# Admin endpoints are only enabled when a token is configured
+ADMIN_TOKEN = os.environ.get("YOLO_ADMIN_TOKEN")
+
+router = APIRouter(tags=["Admin"], prefix="/admin")
+
+
+def _check_token(token: str):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+def _model_info() -> ModelInfoResponse:
+    return ModelInfoResponse(path=registry.path, backend=registry.backend.name, device=registry.device,
+                             loaded=registry.loaded, classes=len(registry.classes))
+
+
+@router.get("/model", response_model=ModelInfoResponse)
+async def get_model(x_admin_token: str = Header(None)) -> ModelInfoResponse:
+    """Returns the weights file and device used by this worker"""
+    _check_token(x_admin_token)
+    return _model_info()
+
+
+@router.put("/model", response_model=ModelInfoResponse)
+def swap_model(path: str, x_admin_token: str = Header(None)) -> ModelInfoResponse:
+    """Hot-swaps the weights file of this worker without a restart.
+    Note that each gunicorn worker holds its own registry, so the call
+    only affects the worker that served it.
+
+    Arguments:
+        path (str): Path to the new weights file on the server
+
+    Example cURL:
+        curl -X 'PUT' \
+            'http://localhost/admin/model?path=yolocls.pt' \
+            -H 'X-Admin-Token: <token>'
+    """
+    _check_token(x_admin_token)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Weights file not found")
+    try:
+        registry.load(path)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to load model: {e}")
+    return _model_info()
+
+
+@router.get("/batching", response_model=BatchingStatsResponse)
+async def get_batching_stats(x_admin_token: str = Header(None)) -> BatchingStatsResponse:
+    """Returns the queue depth and batch size metrics of this worker"""
+    _check_token(x_admin_token)
+    return BatchingStatsResponse(**default_scheduler.stats())
+
+
+@router.post("/nutritions/reload", response_model=NutritionReloadResponse)
+async def reload_nutritions(x_admin_token: str = Header(None)) -> NutritionReloadResponse:
+    """Reloads the nutrition index of this worker from the database
+    and drops the cached results that carry the old nutrition facts"""
+    _check_token(x_admin_token)
+    count = await run_in_threadpool(nutrition_index.load)
+    result_cache.clear()
+    return NutritionReloadResponse(count=count)
+
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def get_cache_stats(x_admin_token: str = Header(None)) -> CacheStatsResponse:
+    """Returns the hit / miss counters of the result cache of this worker"""
+    _check_token(x_admin_token)
+    return CacheStatsResponse(**result_cache.stats())
@@ -0,0 +1,33 @@
+# For API operations and standards
+from fastapi import APIRouter, Request, Response, status
+# The model shared by every request on this worker
+from detectors.registry import registry
+# For response schemas
+from schemas.health import HealthResponse, ReadinessResponse
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz", response_model=HealthResponse)
+async def healthz() -> HealthResponse:
+    """Liveness probe: the worker is up and its event loop responds"""
+    return HealthResponse(status="ok")
+
+
+@router.get("/readyz",
+            response_model=ReadinessResponse,
+            responses={503: {"description": "Model not loaded or not warmed up yet."}})
+async def readyz(request: Request, response: Response) -> ReadinessResponse:
+    """Readiness probe: only succeeds once the lifespan has loaded and
+    warmed up the model, and fails again while the worker shuts down,
+    so a load balancer never routes to a cold or stopping worker.
+
+    Example cURL:
+        curl 'http://localhost/readyz'
+    """
+    warmed_up = getattr(request.app.state, "ready", False)
+    ready = warmed_up and registry.loaded
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(status="ready" if ready else "starting", model_loaded=registry.loaded,
+                             warmed_up=warmed_up)
@@ -0,0 +1,29 @@
+# For API operations and standards
+from fastapi import APIRouter, Response
+# For the Prometheus text format
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+# For exporting component stats at scrape time
+from detectors.metrics import register_stats
+# The components whose stats are exported
+from detectors.yolov8 import default_scheduler
+from stores.results import result_cache
+
+router = APIRouter(tags=["Monitoring"])
+
+register_stats("yolo_batch", default_scheduler.stats,
+               gauges=("queue_depth", "in_flight", "last_batch_size", "avg_batch_size"),
+               counters=("batches", "images"))
+register_stats("yolo_result_cache", result_cache.stats,
+               gauges=("hit_rate", "size"),
+               counters=("hits", "misses"))
+
+
+@router.get("/metrics", response_class=Response, include_in_schema=False)
+async def metrics() -> Response:
+    """Serves the stage histograms, model load time, batch queue and
+    result cache metrics of this worker in the Prometheus text format
+
+    Example cURL:
+        curl 'http://localhost/metrics'
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,88 +1,280 @@
 # For API operations and standards
-from fastapi import APIRouter, Response, status, HTTPException, Depends
-import urllib3
+from fastapi import APIRouter, BackgroundTasks, File, Response, UploadFile, status, HTTPException
+from fastapi.concurrency import run_in_threadpool
+# For analyzing the images of a batch concurrently
+import asyncio
+from typing import List
+# For environment variables
+import os
 # Our detector objects
 from detectors import yolov8
+from detectors.executor import run_cpu
+# For downloading images by URL
+from detectors.download import DownloadError, ImageDownloader, read_upload
+# For the per-stage timings
+from detectors.metrics import timed, track_request
 # For encoding images
-import cv2
+from detectors.preprocess import decode_image, encode_image, output_extension, output_media_type
+# For rendering label-only results persisted by other workers
+from detectors.registry import registry
+from detectors.result_arrays import from_arrays
 # For response schemas
-from schemas.yolo import ImageAnalysisResponse
-# Gcp
-from google.cloud import storage
-from sqlalchemy.orm import Session
-from database.connection import get_db
-from database.models import Nutritions
+from schemas.yolo import BatchAnalysisResponse, BatchItemResponse, ImageAnalysisResponse, Nutrition, Prediction
+# Object storage for the annotated images
+from stores.blobs import get_blob_storage
+# Bounded cache of annotated images
+from stores.images import get_image_store, get_pending_render_store, new_image_id
+# Nutrition facts preloaded at startup
+from database.nutrition import nutrition_index
+# Results of images that were already analyzed
+from stores.results import result_cache
 
 # A new router object that we can add endpoints to.
 # Note that the prefix is /yolo, so all endpoints from
 # here on will be relative to /yolo
 router = APIRouter(tags=["Image Upload and analysis"], prefix="/yolo")
 
-# A cache of annotated images. Note that this would typically
-# be some sort of persistent storage (think maybe postgres + S3)
-# but for simplicity, we can keep things in memory
-images = []
+# A cache of annotated images, bounded in memory and optionally
+# written to a cache directory shared by every worker
+image_store = get_image_store()
+# Results of label-only requests, rendered on their first download. Also
+# written to the cache directory, when set, so every worker can render them
+pending_renders = get_pending_render_store()
 
-bucket_name = 'my-project-1497313167705.appspot.com'    # 서비스 계정 생성한 bucket 이름 입력
-destination_blob_name = 'test'    # 업로드할 파일을 GCP에 저장할 때의 이름
+blob_prefix = os.environ.get("YOLO_BLOB_PREFIX", "test")    # 업로드할 파일을 GCP에 저장할 때의 경로
+blob_storage = get_blob_storage()
+
+# Shared by every request on this worker and closed by the app lifespan
+downloader = ImageDownloader()
+MAX_BATCH_FILES = int(os.environ.get("YOLO_MAX_BATCH_FILES", "32"))
+
+
+async def analyze_image(contents: bytes, background_tasks: BackgroundTasks,
+                        annotate: bool = True) -> ImageAnalysisResponse:
+    """Runs the detector on raw image bytes, stores the annotated image
+    and looks up the nutrition facts of the detected labels
+
+    Arguments:
+        contents (bytes): The encoded image
+        background_tasks (BackgroundTasks): Where the blob upload is scheduled
+        annotate (bool): Render, store and upload the annotated image now.
+            When False only the labels are computed and the image is
+            rendered and uploaded on its first download instead, by any
+            worker sharing YOLO_IMAGE_CACHE_DIR.
+
+    Returns:
+        result (ImageAnalysisResponse): The analysis of the image
+    """
+    dt = yolov8.YoloV8ImageObjectDetection(chunked=contents)
+    frame = await dt.decode()
+    if frame is None:
+        raise HTTPException(status_code=400, detail="Invalid image")
+    # 같은 사진을 다시 올린 경우 추론 없이 이전 결과 반환
+    with timed("cache"):
+        cache_keys = await run_cpu(result_cache.keys, frame)
+    if not annotate:
+        cache_keys = [f"{key}:labels" for key in cache_keys]
+    cached = result_cache.get(cache_keys)
+    if cached is not None:
+        return cached
+    image_id = new_image_id()
+    blob_name = None
+    if annotate:
+        frame, labels, result = await dt.detect(frame)
+    else:
+        # 박스 그리기 / 인코딩 / 업로드 생략, 첫 다운로드 때 렌더링
+        result, labels = await dt.detect_labels(frame)
+        await run_in_threadpool(pending_renders.put, image_id, result, contents)
+    print(labels)
+    top_k = [Prediction(class_id=c, name=name, confidence=conf) for c, name, conf in dt.top_k(result)]
+    # 메모리에 올려둔 영양정보 조회 (DB 접근 없음), 신뢰도 높은 순
+    ranked = [p.name for p in top_k] + sorted(labels - {p.name for p in top_k})
+    nutritions = [Nutrition(id=nut.id, name=nut.name, weight=nut.weight, kcal=nut.kcal, carb=nut.carbonate,
+                            sugar=nut.sugar, protein=nut.protein, fat=nut.fat)
+                  for nut in map(nutrition_index.get, ranked) if nut is not None]
+    if annotate:
+        with timed("encode"):
+            success, encoded_image = await run_cpu(encode_image, frame)
+        if success:
+            with timed("store"):
+                await run_in_threadpool(image_store.put, encoded_image.data, image_id)
+            # 응답을 보낸 뒤 메모리의 버퍼를 업로드
+            blob_name = f"{blob_prefix}/{image_id}{output_extension()}"
+            background_tasks.add_task(_upload, blob_name, encoded_image.data)
+    if not nutritions:
+        analysis = ImageAnalysisResponse(id=image_id, is_success=False, labels=labels, name="", kcal=0,
+                                         top_k=top_k, blob_name=blob_name)
+    else:
+        top = nutritions[0]
+        analysis = ImageAnalysisResponse(id=image_id, is_success=True, labels=labels, name=top.name, kcal=top.kcal,
+                                         carb=top.carb, protein=top.protein, fat=top.fat, weight=top.weight,
+                                         nutritions=nutritions, top_k=top_k, blob_name=blob_name)
+    result_cache.put(cache_keys, analysis)
+    return analysis
+
+
+def _upload(name: str, data):
+    with timed("upload"):
+        blob_storage.upload(name, data, output_media_type())
 
-storage_client = storage.Client(project="my-project-1497313167705")
-bucket = storage_client.bucket(bucket_name)
-blob = bucket.blob(destination_blob_name)
 
 @router.post("/",
              status_code=status.HTTP_201_CREATED,
              responses={
-                 201: {"description": "Successfully Analyzed Image."}
+                 201: {"description": "Successfully Analyzed Image."},
+                 400: {"description": "Invalid Image or URL."},
+                 413: {"description": "Image Too Large."},
+                 415: {"description": "Not An Image."},
+                 502: {"description": "Image Download Failed."},
+                 504: {"description": "Image Download Timed Out."}
              },
              response_model=ImageAnalysisResponse,
              )
-async def yolo_image_upload(url: str, db: Session = Depends(get_db)) -> ImageAnalysisResponse:
-    http = urllib3.PoolManager()
-    contents = http.request('GET', url, preload_content=False).read()
-    dt = yolov8.YoloV8ImageObjectDetection(chunked=contents)
-    frame, labels = await dt()
-    print(labels)
-    #query = db.query(Nutritions).filter(Nutritions.id == int(list(labels)[0]))
-    #nuts = query.all()
-    #data = [{'id': nut.id, 'name': nut.name, 'kcal': nut.kcal} for nut in nuts]
-    data = [{'id': '1234', 'name': 'dish', 'kcal': '123'}]
-    success, encoded_image = cv2.imencode(".png", frame)
-    if success:
-        # 인코딩된 바이트 배열을 파일로 저장
-        with open('encoded_image.jpg', 'wb') as f:
-            f.write(encoded_image)
-    blob.upload_from_filename('encoded_image.jpg')
-    images.append(encoded_image)
-    return ImageAnalysisResponse(id=len(images), labels=labels, name=data[0]['name'], kcal=data[0]['kcal'])
+async def yolo_image_upload(url: str, background_tasks: BackgroundTasks,
+                            annotate: bool = True) -> ImageAnalysisResponse:
+    with track_request("url"):
+        try:
+            with timed("download"):
+                contents = await downloader.fetch(url)
+        except DownloadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        return await analyze_image(contents, background_tasks, annotate)
+
+
+@router.post("/image",
+             status_code=status.HTTP_201_CREATED,
+             responses={
+                 201: {"description": "Successfully Analyzed Image."},
+                 400: {"description": "Invalid Image."},
+                 413: {"description": "Image Too Large."},
+                 415: {"description": "Not An Image."}
+             },
+             response_model=ImageAnalysisResponse,
+             )
+async def yolo_image_bytes_upload(background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                                  annotate: bool = True) -> ImageAnalysisResponse:
+    """Takes the image itself as multipart form data, so the caller can
+    forward an upload without storing it and sending a URL first.
+    Pass annotate=false to only get the labels; the annotated image is
+    then rendered on the first GET /yolo/{image_id}.
+
+    Example cURL:
+        curl -X 'POST' \
+            'http://localhost/yolo/image?annotate=false' \
+            -F 'file=@meal.jpg'
+    """
+    with track_request("image"):
+        try:
+            contents = await read_upload(file)
+        except DownloadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        return await analyze_image(contents, background_tasks, annotate)
+
+
+async def _analyze_item(index: int, file: UploadFile, background_tasks: BackgroundTasks,
+                        annotate: bool) -> BatchItemResponse:
+    try:
+        with track_request("images"):
+            contents = await read_upload(file)
+            result = await analyze_image(contents, background_tasks, annotate)
+    except (HTTPException, DownloadError) as e:
+        return BatchItemResponse(index=index, filename=file.filename, error=str(e.detail))
+    except Exception as e:
+        return BatchItemResponse(index=index, filename=file.filename, error=str(e))
+    return BatchItemResponse(index=index, filename=file.filename, result=result)
+
+
+@router.post("/images",
+             status_code=status.HTTP_201_CREATED,
+             responses={
+                 201: {"description": "Analyzed the images, see each item for its result or error."},
+                 400: {"description": "Too Many Images."}
+             },
+             response_model=BatchAnalysisResponse,
+             )
+async def yolo_images_upload(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...),
+                             annotate: bool = True) -> BatchAnalysisResponse:
+    """Takes several images as multipart form data. They are submitted
+    together, so the batch scheduler scores them in as few model calls
+    as possible. A failing image is reported in its own item and does
+    not fail the others.
+
+    Example cURL:
+        curl -X 'POST' \
+            'http://localhost/yolo/images?annotate=false' \
+            -F 'files=@breakfast.jpg' -F 'files=@lunch.jpg'
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} images per batch")
+    items = await asyncio.gather(*(_analyze_item(i, f, background_tasks, annotate) for i, f in enumerate(files)))
+    return BatchAnalysisResponse(items=items)
+
+
+def _pending_result(image_id: str):
+    """Looks the result of a label-only request up in this worker, then
+    in the cache directory shared with the other workers"""
+    result = pending_renders.get(image_id)
+    if result is not None:
+        return result
+    record = pending_renders.load(image_id)
+    if record is None:
+        return None
+    contents, arrays = record
+    frame = decode_image(contents)
+    if frame is None:
+        return None
+    return from_arrays(frame, registry.get().names, **arrays)
+
+
+def _render_pending(image_id: str):
+    """Renders and stores the annotated image of a label-only request
+
+    Returns:
+        content (bytes | None): The encoded image, None when not pending
+    """
+    result = _pending_result(image_id)
+    if result is None:
+        return None
+    with timed("render"):
+        success, encoded_image = encode_image(yolov8.render(result))
+    if not success:
+        return None
+    image_store.put(encoded_image.data, image_id)
+    pending_renders.remove(image_id)
+    return encoded_image.tobytes()
 
 @router.get(
     "/{image_id}",
     status_code=status.HTTP_200_OK,
     responses={
-        200: {"content": {"image/png": {}}},
+        200: {"content": {output_media_type(): {}}},
         404: {"description": "Image ID Not Found."}
     },
     response_class=Response,
 )
-async def yolo_image_download(image_id: int) -> Response:
+async def yolo_image_download(image_id: str, background_tasks: BackgroundTasks) -> Response:
     """Takes an image id as a path param and returns that encoded
-    image from the images array
+    image from the annotated image store. The image of a label-only
+    request is rendered here and then uploaded like an annotated one.
 
     Arguments:
-        image_id (int): The image ID to download
+        image_id (str): The image ID to download
 
     Returns:
-        response (Response): The encoded image in PNG format
+        response (Response): The encoded image in the YOLO_OUTPUT_FORMAT format
 
     Examlple cURL:
         curl -X 'GET' \
-            'http://localhost/yolo/1' \
-            -H 'accept: image/png'
+            'http://localhost/yolo/0f8fad5bd9cb469fa16570867728950e' \
+            -H 'accept: image/jpeg'
 
     Example Return: A Binary Image
     """
-    try:
-        return Response(content=images[image_id - 1].tobytes(), media_type="image/png")
-    except IndexError:
-        raise HTTPException(status_code=404, detail="Image not found")
\ No newline at end of file
+    content = await run_in_threadpool(image_store.get, image_id)
+    if content is None:
+        content = await run_cpu(_render_pending, image_id)
+        if content is not None:
+            background_tasks.add_task(_upload, f"{blob_prefix}/{image_id}{output_extension()}", content)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(content=content, media_type=output_media_type())
\ No newline at end of file
@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+
+class ModelInfoResponse(BaseModel):
+    path: str
+    backend: str
+    device: Optional[str]
+    loaded: bool
+    classes: int
+
+
+class BatchingStatsResponse(BaseModel):
+    queue_depth: int
+    max_batch_size: int
+    max_wait_ms: float
+    concurrency: int
+    in_flight: int
+    batches: int
+    images: int
+    last_batch_size: int
+    avg_batch_size: float
+    batch_sizes: Dict[int, int]
+
+
+class NutritionReloadResponse(BaseModel):
+    count: int
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    size: int
+    maxsize: int
+    ttl: float
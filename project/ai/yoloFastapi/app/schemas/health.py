@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class HealthResponse(BaseModel):
+    status: str
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    model_loaded: bool
+    warmed_up: bool
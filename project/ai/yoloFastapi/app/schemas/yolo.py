@@ -1,10 +1,46 @@
 from pydantic import BaseModel
-from typing import Set
+from typing import List, Optional, Set
 import decimal
 
 
-class ImageAnalysisResponse(BaseModel):
+class Nutrition(BaseModel):
     id: int
     name: str
+    weight: decimal.Decimal
     kcal: decimal.Decimal
-    labels: Set[str]
\ No newline at end of file
+    carb: decimal.Decimal
+    sugar: decimal.Decimal
+    protein: decimal.Decimal
+    fat: decimal.Decimal
+
+
+class Prediction(BaseModel):
+    class_id: int
+    name: str
+    confidence: float
+
+
+class ImageAnalysisResponse(BaseModel):
+    id: str
+    is_success: bool
+    name: str
+    kcal: decimal.Decimal
+    carb: decimal.Decimal = decimal.Decimal(0)
+    protein: decimal.Decimal = decimal.Decimal(0)
+    fat: decimal.Decimal = decimal.Decimal(0)
+    weight: decimal.Decimal = decimal.Decimal(0)
+    labels: Set[str]
+    nutritions: List[Nutrition] = []
+    top_k: List[Prediction] = []
+    blob_name: Optional[str] = None
+
+
+class BatchItemResponse(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    result: Optional[ImageAnalysisResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    items: List[BatchItemResponse]
@@ -0,0 +1,69 @@
+# For environment variables
+import os
+
+# Which object storage the annotated images go to: "gcs" or "local"
+BACKEND = os.environ.get("YOLO_STORAGE_BACKEND", "gcs")
+PROJECT = os.environ.get("YOLO_GCS_PROJECT", "my-project-1497313167705")
+BUCKET_NAME = os.environ.get("YOLO_GCS_BUCKET", "my-project-1497313167705.appspot.com")  # 서비스 계정 생성한 bucket 이름 입력
+LOCAL_DIR = os.environ.get("YOLO_LOCAL_STORAGE_DIR", "blobs")
+
+
+class GCSBlobStorage:
+    """Uploads buffers to a Google Cloud Storage bucket"""
+
+    def __init__(self, project: str = PROJECT, bucket_name: str = BUCKET_NAME):
+        # Imported here so the local backend works without the GCP client
+        from google.cloud import storage
+        self.client = storage.Client(project=project)
+        self.bucket = self.client.bucket(bucket_name)
+
+    def upload(self, name: str, data, content_type: str = "image/png"):
+        """Uploads a buffer from memory. The GCS client only sends bytes, so
+        a buffer view (e.g. of the cv2 buffer) is copied once here; bytes
+        are passed as they are.
+
+        Arguments:
+            name (str): The object name in the bucket
+            data (bytes-like): The encoded image, e.g. a memoryview of the cv2 buffer
+            content_type (str): The MIME type stored with the object
+        """
+        self.bucket.blob(name).upload_from_string(bytes(data), content_type=content_type)
+
+
+class LocalBlobStorage:
+    """Writes buffers under a local directory. Used for tests and
+    deployments without GCS.
+    """
+
+    def __init__(self, root: str = LOCAL_DIR):
+        self.root = root
+
+    def path(self, name: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, name))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid object name: {name}")
+        return path
+
+    def upload(self, name: str, data, content_type: str = "image/png"):
+        """Writes a buffer to <root>/<name>
+
+        Arguments:
+            name (str): The object name relative to the root directory
+            data (bytes-like): The encoded image
+            content_type (str): Ignored, kept for interface parity
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(memoryview(data))
+
+
+def get_blob_storage():
+    """Builds the backend selected by YOLO_STORAGE_BACKEND
+
+    Returns:
+        storage (GCSBlobStorage | LocalBlobStorage): The configured backend
+    """
+    if BACKEND == "local":
+        return LocalBlobStorage()
+    return GCSBlobStorage()
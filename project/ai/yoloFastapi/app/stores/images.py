@@ -0,0 +1,302 @@
+# For the LRU order of cached images
+from collections import OrderedDict
+# For serializing pending renders
+import io
+import numpy as np
+# For guarding the cache between the event loop and worker threads
+import threading
+# For environment variables
+import os
+# For ids that are unique across gunicorn workers
+import uuid
+# For the periodic rescan of the cache directory
+import time
+# For the file suffix of cached images
+from detectors.preprocess import output_extension
+# For persisting the results of label-only requests
+from detectors.result_arrays import to_arrays
+
+MAX_MEMORY_BYTES = int(os.environ.get("YOLO_IMAGE_CACHE_BYTES", str(64 * 1024 * 1024)))
+CACHE_DIR = os.environ.get("YOLO_IMAGE_CACHE_DIR")  # Shared by all workers, disabled when unset
+MAX_DISK_BYTES = int(os.environ.get("YOLO_IMAGE_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+# Seconds between rescans of the cache directory, which pick up the files written by other workers
+RESCAN_SECONDS = float(os.environ.get("YOLO_IMAGE_CACHE_RESCAN_SECONDS", "60"))
+MAX_PENDING_BYTES = int(os.environ.get("YOLO_PENDING_RENDER_BYTES", str(256 * 1024 * 1024)))
+MAX_PENDING_DISK_BYTES = int(os.environ.get("YOLO_PENDING_RENDER_DISK_BYTES", str(1024 * 1024 * 1024)))
+
+
+def new_image_id() -> str:
+    """Creates an image id. uuid4 hex ids are unique across workers and
+    safe to use as file names, so any worker sharing the cache directory
+    can serve them.
+
+    Returns:
+        image_id (str): A 32 character hex id
+    """
+    return uuid.uuid4().hex
+
+
+def _valid_id(image_id: str) -> bool:
+    return len(image_id) == 32 and all(c in "0123456789abcdef" for c in image_id)
+
+
+class MemoryImageStore:
+    """Keeps encoded images in memory up to a total byte size and evicts
+    the least recently used ones past that.
+    """
+
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prepare(self, data):
+        data = bytes(data)
+        return data, len(data)
+
+    def put(self, image_id: str, data: bytes):
+        """Stores an encoded image and evicts old ones past the size limit
+
+        Arguments:
+            image_id (str): The id returned to the client
+            data (bytes): The encoded image
+        """
+        data, size = self._prepare(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(image_id, None)
+            if old is not None:
+                self.size -= old[1]
+            self._images[image_id] = (data, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._images.popitem(last=False)
+                self.size -= evicted
+
+    def get(self, image_id: str):
+        """Returns an encoded image and marks it as recently used
+
+        Arguments:
+            image_id (str): The id returned to the client
+
+        Returns:
+            data (bytes | None): The encoded image, None when evicted or unknown
+        """
+        with self._lock:
+            entry = self._images.get(image_id)
+            if entry is None:
+                return None
+            self._images.move_to_end(image_id)
+            return entry[0]
+
+    def remove(self, image_id: str):
+        with self._lock:
+            entry = self._images.pop(image_id, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def __len__(self):
+        return len(self._images)
+
+
+class PendingRenderStore(MemoryImageStore):
+    """Keeps the raw results of label-only requests, bounded by the size
+    of their frames, until their annotated image is first requested.
+    With a disk store, the uploaded image and the boxes / probs arrays
+    are also written to the shared cache directory, so any worker can
+    render the image, even after this worker evicted or lost it.
+    """
+
+    def __init__(self, max_bytes: int = MAX_PENDING_BYTES, disk: "DiskImageStore" = None):
+        super().__init__(max_bytes)
+        self.disk = disk
+
+    def _prepare(self, result):
+        return result, result.orig_img.nbytes
+
+    def put(self, image_id: str, result, contents: bytes = None):
+        """Stores the result of a label-only request
+
+        Arguments:
+            image_id (str): The id returned to the client
+            result (ultralytics.engine.results.Results): The result to render later
+            contents (bytes): The uploaded image, needed to persist the result
+        """
+        super().put(image_id, result)
+        if self.disk is not None and contents is not None:
+            buffer = io.BytesIO()
+            arrays = {key: value for key, value in to_arrays(result).items() if value is not None}
+            np.savez(buffer, image=np.frombuffer(contents, dtype=np.uint8), **arrays)
+            self.disk.put(image_id, buffer.getbuffer())
+
+    def load(self, image_id: str):
+        """Reads a result persisted by another worker
+
+        Arguments:
+            image_id (str): The id returned to the client
+
+        Returns:
+            record (tuple(bytes, dict) | None): The uploaded image and the
+                boxes / probs arrays, None when not persisted
+        """
+        if self.disk is None or not _valid_id(image_id):
+            return None
+        data = self.disk.get(image_id)
+        if data is None:
+            return None
+        with np.load(io.BytesIO(data)) as record:
+            return record["image"].tobytes(), {key: record[key] for key in ("boxes", "probs") if key in record}
+
+    def remove(self, image_id: str):
+        super().remove(image_id)
+        if self.disk is not None:
+            self.disk.remove(image_id)
+
+
+class DiskImageStore:
+    """Keeps encoded images as files in a directory that every worker of
+    the container can read, and deletes the oldest files past a total
+    byte size. The total is tracked from this worker's own writes; the
+    directory is only scanned when that estimate passes the limit or
+    every `rescan_seconds`, so other workers' files are counted too.
+    """
+
+    def __init__(self, root: str, max_bytes: int = MAX_DISK_BYTES, suffix: str = None,
+                 rescan_seconds: float = RESCAN_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix or output_extension()
+        self.rescan_seconds = rescan_seconds
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._evict()
+
+    def _path(self, image_id: str) -> str:
+        return os.path.join(self.root, image_id + self.suffix)
+
+    def put(self, image_id: str, data: bytes):
+        # Write then rename, so other workers never read a partial file
+        path = self._path(image_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(memoryview(data))
+        os.replace(tmp, path)
+        with self._lock:
+            self.size += memoryview(data).nbytes
+            due = self.size > self.max_bytes or time.monotonic() - self._scanned_at >= self.rescan_seconds
+        if due:
+            self._evict()
+
+    def get(self, image_id: str):
+        try:
+            with open(self._path(image_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, image_id: str):
+        try:
+            os.remove(self._path(image_id))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Scans the directory, deletes the oldest files past the size
+        limit and resets the size estimate to what is left"""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.suffix):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self.size = total
+            self._scanned_at = time.monotonic()
+
+
+class AnnotatedImageStore:
+    """Annotated image store used by the router. Recent images are
+    served from the in-memory LRU; with a cache directory configured
+    every image is also written there so it survives memory eviction
+    and can be served by any worker.
+    """
+
+    def __init__(self, memory: MemoryImageStore = None, disk: DiskImageStore = None):
+        self.memory = memory if memory is not None else MemoryImageStore()
+        self.disk = disk
+
+    def put(self, data: bytes, image_id: str = None) -> str:
+        """Stores an encoded image
+
+        Arguments:
+            data (bytes): The encoded image
+            image_id (str): The id to store it under, a new one by default
+
+        Returns:
+            image_id (str): The id to look the image up with
+        """
+        image_id = image_id or new_image_id()
+        self.memory.put(image_id, data)
+        if self.disk is not None:
+            self.disk.put(image_id, data)
+        return image_id
+
+    def get(self, image_id: str):
+        """Looks an image up in memory, then in the cache directory
+
+        Arguments:
+            image_id (str): The id returned by `put`
+
+        Returns:
+            data (bytes | None): The encoded image, None when unknown
+        """
+        if not _valid_id(image_id):
+            return None
+        data = self.memory.get(image_id)
+        if data is None and self.disk is not None:
+            data = self.disk.get(image_id)
+            if data is not None:
+                self.memory.put(image_id, data)
+        return data
+
+
+def get_pending_render_store() -> PendingRenderStore:
+    """Builds the pending render store, persisted under the cache
+    directory when YOLO_IMAGE_CACHE_DIR is set. Without a cache
+    directory label-only images can only be downloaded from the worker
+    that analyzed them, so run a single worker in that setup.
+
+    Returns:
+        store (PendingRenderStore): The configured store
+    """
+    disk = None
+    if CACHE_DIR:
+        disk = DiskImageStore(os.path.join(CACHE_DIR, "pending"), MAX_PENDING_DISK_BYTES, suffix=".npz")
+    return PendingRenderStore(MAX_PENDING_BYTES, disk)
+
+
+def get_image_store() -> AnnotatedImageStore:
+    """Builds the store configured by the YOLO_IMAGE_CACHE_* variables
+
+    Returns:
+        store (AnnotatedImageStore): The configured store
+    """
+    disk = DiskImageStore(CACHE_DIR) if CACHE_DIR else None
+    return AnnotatedImageStore(MemoryImageStore(), disk)
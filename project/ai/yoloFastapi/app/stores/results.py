@@ -0,0 +1,126 @@
+# For hashing decoded images
+import hashlib
+# For guarding the cache between the event loop and worker threads
+import threading
+# For environment variables
+import os
+# For the perceptual hash
+import cv2
+import numpy as np
+# TTL + LRU cache
+from cachetools import TTLCache
+
+MAX_ENTRIES = int(os.environ.get("YOLO_RESULT_CACHE_SIZE", "1024"))
+TTL_SECONDS = float(os.environ.get("YOLO_RESULT_CACHE_TTL", "600"))
+PERCEPTUAL = os.environ.get("YOLO_RESULT_CACHE_PERCEPTUAL", "0") == "1"
+
+
+def content_hash(frame: np.ndarray) -> str:
+    """Hashes the decoded pixels, so the same photo matches even when
+    it is re-uploaded with different metadata.
+
+    Arguments:
+        frame (numpy.ndarray): The decoded image
+
+    Returns:
+        digest (str): A hex digest of the shape and pixel bytes
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(frame.shape).encode())
+    h.update(np.ascontiguousarray(frame).data)
+    return h.hexdigest()
+
+
+def perceptual_hash(frame: np.ndarray) -> str:
+    """Computes a 64 bit difference hash, which stays the same when a
+    photo is re-encoded or slightly resized.
+
+    Arguments:
+        frame (numpy.ndarray): The decoded image
+
+    Returns:
+        digest (str): The hash as 16 hex characters
+    """
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    elif frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return "p" + np.packbits(bits).tobytes().hex()
+
+
+class ResultCache:
+    """Caches inference responses keyed by image content for a limited
+    time, evicting the least recently used entries past `maxsize`.
+    """
+
+    def __init__(self, maxsize: int = MAX_ENTRIES, ttl: float = TTL_SECONDS, perceptual: bool = PERCEPTUAL):
+        """Creates the cache
+
+        Arguments:
+            maxsize (int): Maximum number of cached results
+            ttl (float): Seconds a result stays valid
+            perceptual (bool): Also match re-encoded copies by perceptual hash
+        """
+        self.perceptual = perceptual
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def keys(self, frame: np.ndarray) -> list:
+        """Computes the cache keys of a decoded image, exact match first
+
+        Arguments:
+            frame (numpy.ndarray): The decoded image
+
+        Returns:
+            keys (list(str)): The keys to look the result up with
+        """
+        keys = [content_hash(frame)]
+        if self.perceptual:
+            keys.append(perceptual_hash(frame))
+        return keys
+
+    def get(self, keys: list):
+        with self._lock:
+            for key in keys:
+                value = self._cache.get(key)
+                if value is not None:
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, keys: list, value):
+        with self._lock:
+            for key in keys:
+                self._cache[key] = value
+
+    def clear(self):
+        """Drops every cached result, e.g. after the model or the
+        nutrition facts they were computed with changed
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit / miss counters
+
+        Returns:
+            stats (dict): Counters and current size of the cache
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,93 @@
+"""Compares the latency and predictions of the inference backends in
+detectors.backends on a fixed directory of local images.
+
+The torch backend is the reference: for every other backend the script
+reports how often its top label matches torch on the same image.
+
+    python benchmarks/backend_bench.py samples/ --weights app/yolocls.pt \
+        --backends torch onnx onnx-int8 openvino
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from detectors.backends import OnnxBackend, OpenVinoBackend, TorchBackend  # noqa: E402
+from detectors.preprocess import decode_image  # noqa: E402
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+VARIANTS = {
+    "torch": lambda: TorchBackend(),
+    "onnx": lambda: OnnxBackend(int8=False),
+    "onnx-int8": lambda: OnnxBackend(int8=True),
+    "openvino": lambda: OpenVinoBackend(int8=False),
+    "openvino-int8": lambda: OpenVinoBackend(int8=True),
+}
+
+
+def load_frames(directory):
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(EXTENSIONS):
+            with open(os.path.join(directory, name), "rb") as f:
+                frame = decode_image(f.read())
+            if frame is not None:
+                frames.append((name, frame))
+    return frames
+
+
+def top_label(result):
+    if getattr(result, "probs", None) is not None:
+        return result.names[int(result.probs.top1)]
+    if result.boxes is not None and len(result.boxes):
+        best = int(result.boxes.conf.argmax())
+        return result.names[int(result.boxes.cls[best])]
+    return None
+
+
+def run_backend(backend, weights, frames, conf, warmup):
+    start = time.perf_counter()
+    model, _ = backend.load(weights)
+    load_ms = (time.perf_counter() - start) * 1000
+    for _, frame in frames[:warmup]:
+        model([frame], conf=conf, verbose=False)
+    latencies, labels = [], {}
+    for name, frame in frames:
+        start = time.perf_counter()
+        result = model([frame], conf=conf, verbose=False)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        labels[name] = top_label(result)
+    return load_ms, latencies, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory of sample images")
+    parser.add_argument("--weights", required=True, help="PyTorch weights file")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"], choices=list(VARIANTS))
+    parser.add_argument("--conf", type=float, default=0.70)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.directory)
+    if not frames:
+        sys.exit(f"No images found in {args.directory}")
+
+    reference = None
+    print(f"{'backend':>14}  {'load ms':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'img/s':>7}  {'agree':>6}")
+    for variant in args.backends:
+        load_ms, latencies, labels = run_backend(VARIANTS[variant](), args.weights, frames, args.conf, args.warmup)
+        if reference is None:
+            reference = labels
+        agree = sum(labels[name] == reference[name] for name in labels) / len(labels)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(f"{variant:>14}  {load_ms:9.0f}  {statistics.median(latencies):8.2f}  {p95:8.2f}  "
+              f"{1000 / statistics.fmean(latencies):7.2f}  {agree:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
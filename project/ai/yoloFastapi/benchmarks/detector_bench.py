@@ -0,0 +1,173 @@
+"""Offline CPU benchmark and regression check for YoloV8ImageObjectDetection.
+
+Replays a directory of sample food images through the detector stages
+(decode, inference, post-process) and reports per-stage timing,
+images/sec, peak RSS and label stability. Everything runs in-process on
+the CPU, without the HTTP app, the database or object storage.
+
+Record a baseline once on the reference machine:
+
+    python benchmarks/detector_bench.py samples/ --weights app/yolocls.pt \
+        --baseline benchmarks/baseline.json --update-baseline
+
+Then compare against it, exiting with status 1 when throughput drops by
+more than --threshold or the labels of an image change:
+
+    python benchmarks/detector_bench.py samples/ --weights app/yolocls.pt \
+        --baseline benchmarks/baseline.json --check
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from detectors.backends import get_backend  # noqa: E402
+from detectors.preprocess import encode_image  # noqa: E402
+from detectors.registry import ModelRegistry  # noqa: E402
+from detectors.yolov8 import YoloV8ImageObjectDetection, score_frames  # noqa: E402
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+STAGES = ("decode", "inference", "postprocess")
+
+
+def load_images(directory):
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(EXTENSIONS):
+            with open(os.path.join(directory, name), "rb") as f:
+                images.append((name, f.read()))
+    return images
+
+
+def load_registry(weights, backend):
+    registry = ModelRegistry(weights, get_backend(backend, serving_mode="inline"))
+    model = registry.load()
+    if backend == "torch":
+        # Keep runs comparable across hosts with and without an accelerator
+        model.to("cpu")
+        registry.device = "cpu"
+    return registry
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(images, registry, repeat, warmup):
+    timings = {stage: [] for stage in STAGES}
+    labels = {}
+    stable = {}
+    model = registry.get()
+    for name, data in images[:warmup]:
+        dt = YoloV8ImageObjectDetection(chunked=data, registry=registry)
+        score_frames([dt._get_image_from_chunked()], model)
+
+    started = time.perf_counter()
+    processed = 0
+    for _ in range(repeat):
+        for name, data in images:
+            dt = YoloV8ImageObjectDetection(chunked=data, registry=registry)
+
+            start = time.perf_counter()
+            frame = dt._get_image_from_chunked()
+            decoded = time.perf_counter()
+            results = score_frames([frame], model)
+            scored = time.perf_counter()
+            annotated, found = dt.plot_boxes(results, frame)
+            encode_image(annotated)
+            done = time.perf_counter()
+
+            timings["decode"].append((decoded - start) * 1000)
+            timings["inference"].append((scored - decoded) * 1000)
+            timings["postprocess"].append((done - scored) * 1000)
+            found = sorted(set(found))
+            stable[name] = stable.get(name, True) and labels.get(name, found) == found
+            labels[name] = found
+            processed += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "images": len(images),
+        "repeat": repeat,
+        "images_per_sec": processed / elapsed if elapsed else 0.0,
+        "stages_ms": {stage: {"p50": statistics.median(values),
+                              "mean": statistics.fmean(values),
+                              "max": max(values)} for stage, values in timings.items()},
+        "peak_rss_mib": peak_rss_mib(),
+        "label_stability": sum(stable.values()) / len(stable),
+        "labels": labels,
+    }
+
+
+def report(result):
+    print(f"images/sec: {result['images_per_sec']:.2f}  peak RSS: {result['peak_rss_mib']:.0f} MiB  "
+          f"label stability: {result['label_stability']:.1%}")
+    print(f"{'stage':>12}  {'p50 ms':>8}  {'mean ms':>8}  {'max ms':>8}")
+    for stage, values in result["stages_ms"].items():
+        print(f"{stage:>12}  {values['p50']:8.2f}  {values['mean']:8.2f}  {values['max']:8.2f}")
+
+
+def check(result, baseline, threshold):
+    """Compares a run with the baseline
+
+    Returns:
+        failures (list(str)): What regressed, empty when nothing did
+    """
+    failures = []
+    floor = baseline["images_per_sec"] * (1 - threshold)
+    if result["images_per_sec"] < floor:
+        failures.append(f"throughput {result['images_per_sec']:.2f} img/s is below {floor:.2f} "
+                        f"(baseline {baseline['images_per_sec']:.2f} - {threshold:.0%})")
+    if result["label_stability"] < 1.0:
+        failures.append(f"labels changed between repeats ({result['label_stability']:.1%} stable)")
+    for name, found in result["labels"].items():
+        expected = baseline["labels"].get(name)
+        if expected is not None and expected != found:
+            failures.append(f"labels of {name} changed: {expected} -> {found}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory of sample food images")
+    parser.add_argument("--weights", required=True, help="Weights file")
+    parser.add_argument("--backend", default="torch", help="torch, onnx or openvino")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the image set")
+    parser.add_argument("--warmup", type=int, default=3, help="Images scored before timing starts")
+    parser.add_argument("--baseline", help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when the run regresses against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed throughput drop, 0.15 = 15%%")
+    args = parser.parse_args()
+
+    images = load_images(args.directory)
+    if not images:
+        sys.exit(f"No images found in {args.directory}")
+    result = run(images, load_registry(args.weights, args.backend), args.repeat, args.warmup)
+    report(result)
+
+    if args.update_baseline:
+        if not args.baseline:
+            sys.exit("--update-baseline needs --baseline")
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"baseline written to {args.baseline}")
+    elif args.check:
+        if not args.baseline:
+            sys.exit("--check needs --baseline")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = check(result, baseline, args.threshold)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Concurrent load test for POST /yolo/.
+
+Fires requests at a running YOLO service with a fixed concurrency and
+reports latency percentiles. Run it once against the old build and once
+against the new one, saving each run with --out, then pass the first file
+to --compare on the second run to print both side by side.
+
+    python benchmarks/load_test.py --image-url https://.../meal.jpg \
+        --concurrency 16 --requests 200 --out after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+async def run(target, image_url, concurrency, total, timeout):
+    latencies = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async def one():
+            nonlocal errors
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(target, params={"url": image_url})
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+    }
+
+
+def report(result, baseline=None):
+    keys = ["throughput_rps", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms", "errors"]
+    if baseline is None:
+        for key in keys:
+            print(f"{key:>15}: {result[key]:10.2f}")
+        return
+    print(f"{'':>15}  {'before':>10}  {'after':>10}")
+    for key in keys:
+        print(f"{key:>15}: {baseline[key]:10.2f}  {result[key]:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="http://localhost/yolo/")
+    parser.add_argument("--image-url", required=True)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--out", help="Save the result as JSON")
+    parser.add_argument("--compare", help="JSON result of a previous run to print alongside")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.target, args.image_url, args.concurrency, args.requests, args.timeout))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
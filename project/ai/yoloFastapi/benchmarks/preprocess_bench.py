@@ -0,0 +1,95 @@
+"""Compares the old full-size decode / PNG path with the reduced decode
+and compact output of detectors.preprocess on a directory of images.
+
+Reports per-image decode time, inference time (with --weights) and the
+bytes stored for each annotated image.
+
+    python benchmarks/preprocess_bench.py samples/ --weights app/yolocls.pt
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from detectors.preprocess import decode_image, encode_image  # noqa: E402
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_images(directory):
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(EXTENSIONS):
+            with open(os.path.join(directory, name), "rb") as f:
+                yield name, f.read()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def legacy_decode(data):
+    return cv2.imdecode(np.asarray(bytearray(data), dtype=np.uint8), -1)
+
+
+def legacy_encode(frame):
+    return cv2.imencode(".png", frame)
+
+
+def run(directory, model, conf):
+    rows = {"legacy": [], "reduced": []}
+    for name, data in load_images(directory):
+        for variant, decode, encode in (("legacy", legacy_decode, legacy_encode),
+                                        ("reduced", decode_image, encode_image)):
+            frame, decode_ms = timed(decode, data)
+            if frame is None:
+                print(f"skipping undecodable {name}")
+                break
+            infer_ms = 0.0
+            annotated = frame
+            if model is not None:
+                # YOLO expects 3 channel BGR input
+                if frame.ndim == 2:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+                elif frame.shape[2] == 4:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+                results, infer_ms = timed(lambda f: model([f], conf=conf, verbose=False), frame)
+                annotated = results[0].plot()
+            (_, encoded), encode_ms = timed(encode, annotated)
+            rows[variant].append((decode_ms, infer_ms, encode_ms, encoded.nbytes, frame.shape))
+    return rows
+
+
+def report(rows):
+    print(f"{'':>8}  {'images':>6}  {'decode ms':>10}  {'infer ms':>10}  {'encode ms':>10}  {'stored KiB':>10}")
+    for variant, values in rows.items():
+        if not values:
+            continue
+        decode, infer, encode, size, _ = zip(*values)
+        print(f"{variant:>8}  {len(values):>6}  {statistics.median(decode):10.2f}  {statistics.median(infer):10.2f}  "
+              f"{statistics.median(encode):10.2f}  {statistics.fmean(size) / 1024:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory of sample images")
+    parser.add_argument("--weights", help="Weights file; inference is skipped without it")
+    parser.add_argument("--conf", type=float, default=0.70)
+    args = parser.parse_args()
+
+    model = None
+    if args.weights:
+        from ultralytics import YOLO
+        model = YOLO(args.weights)
+    report(run(args.directory, model, args.conf))
+
+
+if __name__ == "__main__":
+    main()
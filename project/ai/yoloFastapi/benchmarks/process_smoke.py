@@ -0,0 +1,82 @@
+"""Smoke run of the /yolo analysis path in process serving mode.
+
+Starts the inference process pool, then runs routers.yolo.analyze_image
+on every sample image, with and without annotation, exactly as the
+endpoints do. Exits with status 1 when any image fails, e.g. because the
+results rebuilt from the processes do not behave like inline results.
+Blobs are written to a temporary local directory instead of GCS.
+
+    python benchmarks/process_smoke.py samples/ --weights app/yolocls.pt
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory of sample food images")
+    parser.add_argument("--weights", required=True, help="Weights file")
+    parser.add_argument("--backend", default="torch", help="torch, onnx or openvino")
+    parser.add_argument("--processes", type=int, default=1, help="Inference processes")
+    return parser.parse_args()
+
+
+args = parse_args()
+# The app modules read their configuration at import time
+os.environ["YOLO_SERVING_MODE"] = "process"
+os.environ["YOLO_BACKEND"] = args.backend
+os.environ["YOLO_WEIGHTS_PATH"] = args.weights
+os.environ["YOLO_INFERENCE_PROCESSES"] = str(args.processes)
+os.environ["YOLO_STORAGE_BACKEND"] = "local"
+os.environ["YOLO_LOCAL_STORAGE_DIR"] = tempfile.mkdtemp(prefix="yolo-smoke-")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from fastapi import BackgroundTasks  # noqa: E402
+from detectors.registry import registry  # noqa: E402
+from detectors.yolov8 import default_scheduler  # noqa: E402
+from routers import yolo  # noqa: E402
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+async def run(images):
+    failures = 0
+    default_scheduler.start()
+    try:
+        for name, data in images:
+            for annotate in (True, False):
+                try:
+                    result = await yolo.analyze_image(data, BackgroundTasks(), annotate)
+                    # Label-only results are rendered on download, which plots the rebuilt boxes
+                    await yolo.yolo_image_download(result.id, BackgroundTasks())
+                    print(f"ok    {name} annotate={annotate}: {sorted(result.labels)}")
+                except Exception as e:
+                    failures += 1
+                    print(f"FAIL  {name} annotate={annotate}: {type(e).__name__}: {e}")
+    finally:
+        await default_scheduler.stop()
+    return failures
+
+
+def main():
+    images = []
+    for name in sorted(os.listdir(args.directory)):
+        if name.lower().endswith(EXTENSIONS):
+            with open(os.path.join(args.directory, name), "rb") as f:
+                images.append((name, f.read()))
+    if not images:
+        sys.exit(f"No images found in {args.directory}")
+    registry.load()
+    try:
+        failures = asyncio.run(run(images))
+    finally:
+        registry.close()
+    print(f"{len(images) * 2 - failures}/{len(images) * 2} analyses succeeded")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
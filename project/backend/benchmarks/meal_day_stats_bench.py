@@ -0,0 +1,116 @@
+"""
+월별 식단 통계 벤치마크 : 하루씩 조회하던 기존 방식과 GROUP BY 집계 쿼리 비교
+ - 1년치 MealDay를 만든 뒤 12개월의 기록일수/평균 칼로리를 두 방식으로 계산하고
+   쿼리 수와 소요 시간을 출력
+ - 기본은 sqlite 메모리 DB, --url로 MySQL 등 실제 DB 지정 가능 (빈 DB 권장)
+
+    python benchmarks/meal_day_stats_bench.py --year 2024 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+from calendar import monthrange
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="MealDay monthly stats benchmark")
+    parser.add_argument("--url", default="sqlite://", help="SQLAlchemy database URL")
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+args = parse_args()
+# database.py가 import 시점에 설정을 읽으므로 먼저 지정
+os.environ["SQLALCHEMY_DATABASE_URL"] = args.url
+
+from sqlalchemy import event  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from domain.meal_day import meal_day_crud  # noqa: E402
+from models import MealDay  # noqa: E402
+
+queries = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    global queries
+    queries += 1
+
+
+def seed(db, user_id: int, year: int):
+    day = date(year, 1, 1)
+    rows = []
+    while day.year == year:
+        recorded = day.toordinal() % 4 != 0
+        rows.append(MealDay(user_id=user_id, water=0.0, coffee=0.0, alcohol=0.0,
+                            carb=120.0 if recorded else 0.0, protein=60.0 if recorded else 0.0,
+                            fat=40.0 if recorded else 0.0, cheating=0, goalcalorie=2000.0,
+                            nowcalorie=1500.0 + day.day * 10 if recorded else 0.0, burncalorie=0.0,
+                            gb_carb=300.0, gb_protein=60.0, gb_fat=65.0,
+                            weight=70.0 - day.timetuple().tm_yday * 0.01 if day.weekday() == 0 else 0.0,
+                            date=day, track_id=None))
+        day += timedelta(days=1)
+    db.add_all(rows)
+    db.commit()
+
+
+def legacy(db, user_id: int, year: int):
+    ## 기존 라우터 방식 : 월마다 하루씩 get_MealDay_bydate
+    result = []
+    for month in range(1, 13):
+        first_day = date(year, month, 1)
+        last_day = date(year, month, monthrange(year, month)[1])
+        count, total = 0, 0.0
+        date_iter = first_day
+        while date_iter <= last_day:
+            meal = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
+            date_iter += timedelta(days=1)
+            if meal and meal.nowcalorie > 0.0:
+                count += 1
+                total += meal.nowcalorie
+        result.append((count, total / count if count else 0))
+    return result
+
+
+def grouped(db, user_id: int, year: int):
+    stats = meal_day_crud.get_MealDay_stats(db, user_id=user_id, start=date(year, 1, 1), end=date(year, 12, 31))
+    return [(m.record_count, m.avg_calorie) for m in stats]
+
+
+def measure(name, func, db):
+    global queries
+    timings = []
+    for _ in range(args.repeat):
+        db.expire_all()
+        queries = 0
+        start = time.perf_counter()
+        result = func(db, args.user_id, args.year)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{name:>8}: {queries:5d} queries  median {timings[len(timings) // 2]:8.2f} ms  min {timings[0]:8.2f} ms")
+    return result
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, args.user_id, args.year)
+        old = measure("per-day", legacy, db)
+        new = measure("grouped", grouped, db)
+        same = all(a[0] == b[0] and abs(a[1] - b[1]) < 1e-6 for a, b in zip(old, new))
+        print(f"results match: {same}")
+        if not same:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+YoloClient 재시도 / 서킷브레이커 확인 : 로컬 stub YOLO 서버를 띄우고 시나리오별 호출 횟수와 결과 확인
+ - 정상 응답, 503 재시도, 읽기 타임아웃(재시도 없음), 연결 실패(재시도), 서킷 열림
+ - 실패한 시나리오가 있으면 종료코드 1
+
+    python benchmarks/yolo_client_stub.py
+"""
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, File, Response, UploadFile  # noqa: E402
+
+from domain.meal_hour.yolo_service import CircuitBreaker, CircuitOpenError, YoloClient  # noqa: E402
+
+stub = FastAPI()
+calls = {"ok": 0, "unavailable": 0, "slow": 0}
+
+
+@stub.post("/ok/yolo/image")
+async def ok(file: UploadFile = File(...)):
+    calls["ok"] += 1
+    return {"is_success": True, "labels": ["rice"], "size": len(await file.read())}
+
+
+@stub.post("/unavailable/yolo/image")
+async def unavailable(file: UploadFile = File(...)):
+    calls["unavailable"] += 1
+    return Response(status_code=503)
+
+
+@stub.post("/slow/yolo/image")
+async def slow(file: UploadFile = File(...)):
+    calls["slow"] += 1
+    await asyncio.sleep(1.0)
+    return {"is_success": True}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def client(base_url: str, **kwargs) -> YoloClient:
+    return YoloClient(base_url=base_url, timeout=kwargs.pop("timeout", 5.0), retries=2, backoff=0.01, **kwargs)
+
+
+async def send(yolo: YoloClient):
+    return await yolo.analyze_image(b"\xff\xd8\xff", "meal.jpg", "image/jpeg")
+
+
+async def scenarios(base: str, closed: str) -> list:
+    failures = []
+
+    def expect(name, condition, detail=""):
+        print(f"{'ok  ' if condition else 'FAIL'}  {name} {detail}")
+        if not condition:
+            failures.append(name)
+
+    yolo = client(f"{base}/ok")
+    response = await send(yolo)
+    expect("ok", response.status_code == 200 and calls["ok"] == 1, f"status={response.status_code} calls={calls['ok']}")
+    await yolo.close()
+
+    yolo = client(f"{base}/unavailable")
+    response = await send(yolo)
+    expect("503 is retried", response.status_code == 503 and calls["unavailable"] == 3,
+           f"calls={calls['unavailable']}")
+    await yolo.close()
+
+    yolo = client(f"{base}/slow", timeout=0.2)
+    try:
+        await send(yolo)
+        expect("read timeout is not retried", False, "no exception")
+    except httpx.ReadTimeout:
+        await asyncio.sleep(1.0)
+        expect("read timeout is not retried", calls["slow"] == 1 and yolo.breaker.failures == 1,
+               f"calls={calls['slow']} breaker_failures={yolo.breaker.failures}")
+    await yolo.close()
+
+    yolo = client(closed, breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+    for _ in range(2):
+        try:
+            await send(yolo)
+        except httpx.ConnectError:
+            pass
+    try:
+        await send(yolo)
+        expect("circuit opens after connect failures", False, "no exception")
+    except CircuitOpenError:
+        expect("circuit opens after connect failures", True, f"breaker_failures={yolo.breaker.failures}")
+    await yolo.close()
+    return failures
+
+
+def main():
+    port = free_port()
+    server = start_stub(port)
+    try:
+        failures = asyncio.run(scenarios(f"http://127.0.0.1:{port}", f"http://127.0.0.1:{free_port()}"))
+    finally:
+        server.should_exit = True
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from datetime import timedelta, date, datetime
 from domain.group.group_schema import GroupCreate, InviteStatus, GroupDate, Respond, GroupStatus
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select, insert, update, and_, delete
+from sqlalchemy import select, insert, update, and_, delete, func, case
 from domain.meal_day import meal_day_crud
 from domain.track_routine import track_routine_crud
 from models import Group, Track, Invitation, User, MealDay, Participation
@@ -215,71 +215,71 @@ def add_participation(db: Session, user_id: int, group_id: int,
 
 
 def get_track_id_all_in_date(db: Session, start_date: date, finish_date: date, user_id: int):
-    track_ids = []
-    date_iter = start_date
-    while date_iter <= finish_date:
-        mealtoday = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
-        if mealtoday and mealtoday.track_id is not None:
-            track_id = mealtoday.track_id
-            track_ids.append(track_id)
-        date_iter += timedelta(days=1)
-    return track_ids
+    ## 기간 중 MealDay에 설정된 track_id (처음 사용한 날짜 순, 중복 없음)
+    rows = db.query(MealDay.track_id).filter(
+        MealDay.user_id == user_id,
+        MealDay.date >= start_date,
+        MealDay.date <= finish_date,
+        MealDay.track_id.isnot(None)
+    ).group_by(MealDay.track_id).order_by(func.min(MealDay.date)).all()
+    return [row.track_id for row in rows]
+
+
+def clear_mealday_track(db: Session, user_id: int, start_date: date, finish_date: date):
+    ## [start_date, finish_date] MealDay의 트랙 해제 (UPDATE 한 번, commit은 호출한 쪽에서)
+    stmt = (
+        update(MealDay)
+        .where(MealDay.user_id == user_id, MealDay.date >= start_date, MealDay.date <= finish_date)
+        .values(track_id=None, goalcalorie=0.0)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(stmt)
+
+
+def apply_mealday_track(db: Session, user_id: int, track_id: int, start_date: date, goal_calories: list):
+    """
+    start_date부터 goal_calories 길이만큼 MealDay에 트랙과 일자별 목표칼로리 설정
+     - UPDATE 한 번 (goalcalorie는 날짜별 CASE, 목표가 0인 날은 ELSE)
+     - commit은 호출한 쪽에서
+    """
+    if not goal_calories:
+        return
+    finish_date = start_date + timedelta(days=len(goal_calories) - 1)
+    whens = {start_date + timedelta(days=i): calorie for i, calorie in enumerate(goal_calories) if calorie}
+    goalcalorie = case(whens, value=MealDay.date, else_=0.0) if whens else 0.0
+    stmt = (
+        update(MealDay)
+        .where(MealDay.user_id == user_id, MealDay.date >= start_date, MealDay.date <= finish_date)
+        .values(track_id=track_id, goalcalorie=goalcalorie)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(stmt)
 
 
 def update_group_mealday_pushing_start(db: Session, user_id: int, track_id: int, date: date, group_id: int,
                                        duration: int):
-    date_iter = date
     new_group_finish_date = date + timedelta(days=duration-1)
 
-    # MealDay 초기화
-    while date_iter <= new_group_finish_date:
-        mealnew = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
-        if mealnew is None:
-            new_meal = MealDay(
-                user_id=user_id,
-                water=0.0,
-                coffee=0.0,
-                alcohol=0.0,
-                carb=0.0,
-                protein=0.0,
-                fat=0.0,
-                cheating=0,
-                goalcalorie=0.0,
-                nowcalorie=0.0,
-                burncalorie=0.0,
-                gb_carb=300.0,
-                gb_protein=60.0,
-                gb_fat=65.0,
-                weight = 0.0,
-                date=date_iter,
-                track_id=None
-            )
-            db.add(new_meal)
-        date_iter += timedelta(days=1)
-    db.commit()
+    # MealDay 초기화 (트랙 기간에 없는 날짜만 한 번에 생성)
+    meal_day_crud.ensure_MealDay_range(db, user_id=user_id, start=date, end=new_group_finish_date)
 
     track_ids = get_track_id_all_in_date(db, start_date=date, finish_date=new_group_finish_date, user_id=user_id)
     if track_ids:
+        group = None
         for track_id_iter in track_ids:
-            date_iter = date
             group_part = get_group_track_id_in_part_state_start(db, user_id=user_id, track_id=track_id_iter)
             if group_part is None:
                 continue
             group, cheating_count, user_id2, flag, finish_date = group_part
-            while date_iter <= group.finish_day:
-                mealold = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
-                if mealold:
-                    mealold.track_id = None
-                    mealold.goalcalorie = 0.0
-                    db.add(mealold)
-                date_iter += timedelta(days=1)
+            clear_mealday_track(db, user_id=user_id, start_date=date, finish_date=group.finish_day)
             stmt = (
                 update(Participation)
                 .where(Participation.c.user_id == user_id, Participation.c.group_id == group.id)
                 .values(flag=FlagStatus.TERMINATED, finish_date=date - timedelta(days=1))
             )
             db.execute(stmt)
-        group.status=GroupStatus.TERMINATED
+        if group is not None:
+            group.status=GroupStatus.TERMINATED
         db.commit()
 
     # 새 트랙의 Group 시작 종료일 설정
@@ -300,19 +300,10 @@ def update_group_mealday_pushing_start(db: Session, user_id: int, track_id: int,
     db.execute(stmt)
     db.commit()
 
-    # 새로운 MealDay의 Track_id 및 goalcalorie 설정
-    date_iter = date
-    days = 1
-    while date_iter <= groupnew.finish_day:
-        mealnew = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
-        if mealnew:
-            mealnew.track_id = track_id
-            mealnew.goalcalorie = track_routine_crud.get_goal_caloire_bydate_using_trackroutine(db, days=days,
-                                                                                                track_id=track_id,
-                                                                                                date=date_iter)
-            db.add(mealnew)
-        date_iter += timedelta(days=1)
-        days += 1
+    # 새로운 MealDay의 Track_id 및 goalcalorie 설정 (트랙 기간 일자별 목표칼로리를 한 번에 계산해서 UPDATE 한 번)
+    duration = (groupnew.finish_day - date).days + 1
+    goal_calories = track_routine_crud.get_goal_calorie_vector(db, track_id=track_id, start=date, days=duration)
+    apply_mealday_track(db, user_id=user_id, track_id=track_id, start_date=date, goal_calories=goal_calories)
     db.commit()
 
 
@@ -323,16 +314,8 @@ def exit_group(db: Session, user_id: int, date: date, group_id: int):
         raise HTTPException(status_code=404, detail="Not Using Group Now")
     if past_group.start_day > date or past_group.finish_day < date:
         raise HTTPException(status_code=404, detail="Using Group is not in date")
-    date_iter = date+timedelta(days=1) ## 2024-07-02에 종료누르면 2024-07-02까지는 트랙사용
-    finish_date = past_group.finish_day
-    # MealDay 초기화
-    while date_iter <= finish_date:
-        mealold = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
-        if mealold:
-            mealold.track_id = None
-            mealold.goalcalorie = 0.0
-            db.add(mealold)
-        date_iter += timedelta(days=1)
+    # MealDay 초기화 : 2024-07-02에 종료누르면 2024-07-02까지는 트랙사용
+    clear_mealday_track(db, user_id=user_id, start_date=date + timedelta(days=1), finish_date=past_group.finish_day)
     user.cur_group_id = None
     db.add(user)
     _updated = (update(Participation).where(Participation.c.user_id == user_id,
@@ -376,14 +359,5 @@ def delete_start(group: Group, current_user: User, db: Session):
     db.commit()
 
 def update_group_mealday_pushing_stop(db: Session, user_id: int, group: Group):
-    start_date = group.start_day
-    finish_date = group.finish_day
-    date_iter = start_date
-    while date_iter <= finish_date:
-        mealnew = meal_day_crud.get_MealDay_bydate(db, user_id=user_id, date=date_iter)
-        if mealnew:
-            mealnew.track_id = None
-            mealnew.goalcalorie = 0.0
-            db.add(mealnew)
-        date_iter += timedelta(days=1)
+    clear_mealday_track(db, user_id=user_id, start_date=group.start_day, finish_date=group.finish_day)
     db.commit()
\ No newline at end of file
@@ -1,6 +1,7 @@
-from datetime import datetime, date
-from sqlalchemy import or_,and_, update
-from domain.meal_day.meal_day_schema import Mealday_wca_update_schema
+from calendar import monthrange
+from datetime import datetime, date, timedelta
+from sqlalchemy import or_,and_, update, func, case, extract
+from domain.meal_day.meal_day_schema import Mealday_wca_update_schema, MealDay_stats_schema
 from models import MealDay, Participation
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
@@ -67,6 +68,77 @@ def get_meal_list(db: Session, month: int, year: int, user_id: int):
 
     return meals
 
+def _month_range(start: date, end: date):
+    ## [start, end] 기간에 걸친 (year, month, 해당 월에서 기간에 포함된 일수)
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        first = max(start, date(year, month, 1))
+        last = min(end, date(year, month, monthrange(year, month)[1]))
+        yield year, month, (last - first).days + 1
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def get_MealDay_stats(db: Session, user_id: int, start: date, end: date):
+    """
+    [start, end] 기간의 월별 식단 통계를 GROUP BY 쿼리 한 번으로 계산
+     - 기록일 : nowcalorie > 0 인 날 (칼로리 평균/최소/최대도 기록일만)
+     - 몸무게 : weight > 0 인 날
+     - 기록이 없는 월도 0으로 채워서 반환
+    """
+    recorded = MealDay.nowcalorie > 0
+    weighed = MealDay.weight > 0
+    year = extract('year', MealDay.date)
+    month = extract('month', MealDay.date)
+    rows = db.query(
+        year.label("year"),
+        month.label("month"),
+        func.count(case((recorded, 1))).label("record_count"),
+        func.avg(case((recorded, MealDay.nowcalorie))).label("avg_calorie"),
+        func.min(case((recorded, MealDay.nowcalorie))).label("min_calorie"),
+        func.max(case((recorded, MealDay.nowcalorie))).label("max_calorie"),
+        func.sum(MealDay.carb).label("carb"),
+        func.sum(MealDay.protein).label("protein"),
+        func.sum(MealDay.fat).label("fat"),
+        func.count(case((weighed, 1))).label("weight_count"),
+        func.avg(case((weighed, MealDay.weight))).label("avg_weight"),
+        func.min(case((weighed, MealDay.weight))).label("min_weight"),
+        func.max(case((weighed, MealDay.weight))).label("max_weight"),
+    ).filter(
+        MealDay.user_id == user_id,
+        MealDay.date >= start,
+        MealDay.date <= end
+    ).group_by(year, month).all()
+
+    by_month = {(int(row.year), int(row.month)): row for row in rows}
+    stats = []
+    for y, m, days in _month_range(start, end):
+        row = by_month.get((y, m))
+        if row is None:
+            stats.append(MealDay_stats_schema(year=y, month=m, days=days))
+            continue
+        stats.append(MealDay_stats_schema(
+            year=y,
+            month=m,
+            days=days,
+            record_count=row.record_count,
+            avg_calorie=row.avg_calorie or 0.0,
+            min_calorie=row.min_calorie or 0.0,
+            max_calorie=row.max_calorie or 0.0,
+            carb=row.carb or 0.0,
+            protein=row.protein or 0.0,
+            fat=row.fat or 0.0,
+            weight_count=row.weight_count,
+            avg_weight=row.avg_weight,
+            min_weight=row.min_weight,
+            max_weight=row.max_weight
+        ))
+    return stats
+
+def get_MealDay_month_stats(db: Session, user_id: int, year: int, month: int):
+    ## 한 달 통계 (잘못된 year/month면 ValueError)
+    first_day = date(year, month, 1)
+    last_day = date(year, month, monthrange(year, month)[1])
+    return get_MealDay_stats(db, user_id=user_id, start=first_day, end=last_day)[0]
+
 def minus_cheating_count_in_participation(db:Session, group_id: int, user_id: int):
     stmt = update(Participation).where(
         Participation.c.group_id == group_id,
@@ -83,8 +155,9 @@ def update_mealday_cheating(db:Session, mealday: MealDay):
         mealday.cheating = 1
     db.commit()
 
-def create_meal_day(db: Session, user_id: int, date: date):
-    new_meal = MealDay(
+def new_meal_day_values(user_id: int, date: date) -> dict:
+    ## 새 MealDay 기본값
+    return dict(
         user_id=user_id,
         water=0.0,
         coffee=0.0,
@@ -103,11 +176,43 @@ def create_meal_day(db: Session, user_id: int, date: date):
         date=date,
         track_id=None  ## 트랙 user사용중일때 안할때 이거 변경해야할거같은데
     )
+
+def create_meal_day(db: Session, user_id: int, date: date):
+    new_meal = MealDay(**new_meal_day_values(user_id, date))
     db.add(new_meal)
     db.commit()
     db.refresh(new_meal)
     return new_meal
 
+def _insert_ignore_meal_day(db: Session):
+    ## _user_date_daily_uc(user_id, date) 중복은 건너뛰는 INSERT (동시에 같은 날짜를 만드는 요청 대비)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        return insert(MealDay).prefix_with("IGNORE")
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(MealDay).on_conflict_do_nothing(constraint="_user_date_daily_uc")
+    from sqlalchemy.dialects.sqlite import insert
+    return insert(MealDay).on_conflict_do_nothing(index_elements=["user_id", "date"])
+
+def ensure_MealDay_range(db: Session, user_id: int, start: date, end: date) -> int:
+    """
+    [start, end] 기간의 MealDay가 모두 있도록 보장
+     - 이미 있는 날짜 조회 1번 + 없는 날짜 multi-row INSERT 1번, commit 1번
+     - 출력 : 새로 만든 일수
+    """
+    existing = {row.date for row in db.query(MealDay.date).filter(
+        MealDay.user_id == user_id,
+        MealDay.date >= start,
+        MealDay.date <= end).all()}
+    missing = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    missing = [day for day in missing if day not in existing]
+    if missing:
+        db.execute(_insert_ignore_meal_day(db), [new_meal_day_values(user_id, day) for day in missing])
+    db.commit()
+    return len(missing)
+
 def update_burncalorie(db: Session, mealday: MealDay, burncalorie: float):
     mealday.burncalorie = burncalorie
     db.add(mealday)
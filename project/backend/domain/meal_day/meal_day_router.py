@@ -1,5 +1,6 @@
 import datetime
 
+from anyio import from_thread
 from fastapi import APIRouter,  Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
@@ -13,8 +14,8 @@ from domain.track_routine import track_routine_crud
 from domain.user import user_crud
 from domain.user.user_router import get_current_user
 from models import MealDay, MealHour, User,TrackRoutine, TrackRoutineDate
-from datetime import datetime,timedelta
-from firebase_config import bucket
+from datetime import datetime
+from storage_service import signed_url_service
 from calendar import monthrange
 
 router=APIRouter(
@@ -192,11 +193,7 @@ def post_MealDay_date(daytime: str, current_user: User = Depends(get_current_use
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
 
-    meal=meal_day_crud.get_MealDay_bydate(db,user_id=current_user.id,date=date)
-    if meal:
-        return
-    else:
-        meal_day_crud.create_meal_day(db, user_id = current_user.id, date = date)
+    meal_day_crud.ensure_MealDay_range(db, user_id=current_user.id, start=date, end=date)
 
 @router.post("/post/meal_day/{year}/{month}", status_code=status.HTTP_204_NO_CONTENT)
 def post_MealDay_month(year: int, month: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -211,14 +208,8 @@ def post_MealDay_month(year: int, month: int, current_user: User = Depends(get_c
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
 
-    # 해당 월의 모든 날짜에 대해 반복합니다.
-    date_iter = first_day
-    while date_iter <= last_day:
-        meal = meal_day_crud.get_MealDay_bydate(db, user_id = current_user.id, date=date_iter)
-        if not meal:
-            meal_day_crud.create_meal_day(db, user_id = current_user.id, date = date_iter)
-        # 다음 날짜로 이동
-        date_iter += timedelta(days=1)
+    # 해당 월에 없는 날짜만 한 번에 생성
+    meal_day_crud.ensure_MealDay_range(db, user_id=current_user.id, start=first_day, end=last_day)
 
 
 @router.get("/get/calorie/{daytime}", response_model=meal_day_schema.MealDay_calorie_get_schema)
@@ -257,14 +248,13 @@ def get_Track_Mealhour(daytime: str, current_user: User = Depends(get_current_us
     result = []
     meal_hours = meal_hour_crud.get_mealhour_all_by_mealday_id(db, user_id = current_user.id, daymeal_id = meal_today.id)
 
-    for meal in meal_hours:
-        try:
-            # 서명된 URL 생성 (URL은 1시간 동안 유효)
-            blob = bucket.blob(meal.picture)
-            signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    try:
+        # 서명된 URL 생성 (URL은 1시간 동안 유효), 게시글 사진 전체를 한 번에 생성
+        signed_urls = from_thread.run(signed_url_service.signed_urls, [meal.picture for meal in meal_hours])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+    for meal, signed_url in zip(meal_hours, signed_urls):
         meal_info = meal_day_schema.MealDay_track_hour_schema(
             name=meal.name,
             calorie=meal.calorie,
@@ -296,14 +286,13 @@ def get_Track_Mealhour(id: int, daytime: str, db: Session = Depends(get_db)):
     result = []
     meal_hours = meal_hour_crud.get_mealhour_all_by_mealday_id(db, user_id=id, daymeal_id=meal_today.id)
 
-    for meal in meal_hours:
-        try:
-            # 서명된 URL 생성 (URL은 1시간 동안 유효)
-            blob = bucket.blob(meal.picture)
-            signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    try:
+        # 서명된 URL 생성 (URL은 1시간 동안 유효), 게시글 사진 전체를 한 번에 생성
+        signed_urls = from_thread.run(signed_url_service.signed_urls, [meal.picture for meal in meal_hours])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+    for meal, signed_url in zip(meal_hours, signed_urls):
         meal_info = meal_day_schema.MealDay_track_hour_schema(
             name=meal.name,
             calorie=meal.nowcalorie,
@@ -340,16 +329,9 @@ def get_MealDay_dday_goal_real(daytime: str, current_user: User = Depends(get_cu
         raise HTTPException(status_code=404, detail="Group not found")
     group, cheating_count, user_id2, flag, finish_date =group_info
     dday = (date - group.start_day).days + 1
-    ## 트랙id를 가지고 있는 트랙루틴 전체 조회
-    trackroutines = track_routine_crud.get_track_routine_by_track_id(db, track_id=mealday.track_id)
-    goal_time=[]
-    for trackroutine in trackroutines:
-        trackroutinedates = track_routine_crud.get_trackroutinedate_all_by_routine_id_weekday_date(db, routine_id=trackroutine.id,
-                                                                                                   weekday=weekday_number,
-                                                                                                   date=dday)
-        for trackroutinedate in trackroutinedates:
-            info = {"time": trackroutinedate.time, "title":trackroutine.title}
-            goal_time.append(info)
+    ## 캐시된 트랙 스케줄에서 해당 일차/요일의 루틴 조회
+    schedule = track_routine_crud.get_track_schedule(db, track_id=mealday.track_id)
+    goal_time = [{"time": slot.time, "title": slot.title} for slot in schedule.routine_slots(dday, weekday_number)]
 
     meal_info = meal_hour_crud.get_User_Meal_all_name_time(db,user_id=current_user.id,daymeal_id=mealday.id)
     return {"dday" : dday, "goal" : goal_time, "real" : meal_info}
@@ -398,13 +380,13 @@ def get_today_Mealhour(daytime: str, current_user: User = Depends(get_current_us
 
     meal_hours = meal_hour_crud.get_mealhour_all_by_mealday_id(db, user_id=current_user.id,
                                                                daymeal_id=meal_today.id)
-    for meal in meal_hours:
-        try:
-            # 서명된 URL 생성 (URL은 1시간 동안 유효)
-            blob = bucket.blob(meal.picture)
-            signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    try:
+        # 서명된 URL 생성 (URL은 1시간 동안 유효), 게시글 사진 전체를 한 번에 생성
+        signed_urls = from_thread.run(signed_url_service.signed_urls, [meal.picture for meal in meal_hours])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for meal, signed_url in zip(meal_hours, signed_urls):
         time_str = meal.date.strftime('%H:%M')
 
         meal_info = meal_day_schema.MealDay_today_mealhour_schema(
@@ -461,23 +443,12 @@ def get_meal_record_count(year: int, month: int, current_user: User = Depends(ge
         - 출력 : 식단기록일 / 해당월의 총 일수
     """
     try:
-        # 주어진 월의 첫날과 마지막 날을 구합니다.
-        first_day = datetime(year, month, 1).date()
-        last_day = datetime(year, month, monthrange(year, month)[1]).date()
+        # 해당 월 통계를 쿼리 한 번으로 조회
+        stats = meal_day_crud.get_MealDay_month_stats(db, user_id=current_user.id, year=year, month=month)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
-    record_count = 0
-    # 해당 월의 모든 날짜에 대해 반복
-    date_iter = first_day
-    while date_iter <= last_day:
-        meal = meal_day_crud.get_MealDay_bydate(db, user_id=current_user.id, date=date_iter)
-        date_iter += timedelta(days=1)
-        if meal and meal.nowcalorie > 0.0:
-            record_count +=1
 
-    days = (date_iter - first_day).days
-
-    return {"record_count": record_count, "days": days}
+    return {"record_count": stats.record_count, "days": stats.days}
 
 @router.get("/get/meal_avg_calorie/{year}/{month}", response_model=meal_day_schema.MealDay_avg_calorie_schecma)
 def get_meal_record_count(year: int, month: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db))->float:
@@ -487,27 +458,30 @@ def get_meal_record_count(year: int, month: int, current_user: User = Depends(ge
         - 출력 : 식단기록일 / 해당월의 총 일수
     """
     try:
-        # 주어진 월의 첫날과 마지막 날을 구합니다.
-        first_day = datetime(year, month, 1).date()
-        last_day = datetime(year, month, monthrange(year, month)[1]).date()
+        # 해당 월 통계를 쿼리 한 번으로 조회 (기록일 평균, 기록이 없으면 0)
+        stats = meal_day_crud.get_MealDay_month_stats(db, user_id=current_user.id, year=year, month=month)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
-    total_calorie = 0
-    count = 0
-    # 해당 월의 모든 날짜에 대해 반복
-    date_iter = first_day
-    while date_iter <= last_day:
-        meal = meal_day_crud.get_MealDay_bydate(db, user_id=current_user.id, date=date_iter)
-        date_iter += timedelta(days=1)
-        if meal and meal.nowcalorie > 0.0:
-            count += 1
-            total_calorie += meal.nowcalorie
-    days = (date_iter - first_day).days
-    if count >0:
-        avg_calorie = total_calorie/count
-    else:
-        avg_calorie = 0
-    return {"calorie": avg_calorie}
+    return {"calorie": stats.avg_calorie}
+
+@router.get("/get/stats/{start}/{end}", response_model=meal_day_schema.MealDay_stats_list_schema)
+def get_MealDay_stats(start: str, end: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+        기간별 월 단위 식단 통계 조회 (기록일수, 칼로리 평균/최소/최대, 탄단지 합계, 몸무게 추이)
+        - 입력예시 : start = 2024-01-01, end = 2024-12-31
+        - 출력 : 월별 통계 리스트, 몸무게 변화량
+    """
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    months = meal_day_crud.get_MealDay_stats(db, user_id=current_user.id, start=start_date, end=end_date)
+    weights = [m.avg_weight for m in months if m.avg_weight is not None]
+    weight_change = weights[-1] - weights[0] if weights else None
+    return {"months": months, "weight_change": weight_change}
 
 @router.get("/get/goal_now_nutrient/{daytime}", response_model=meal_day_schema.MealDay_today_nutrient_schema)
 def get_MealDay_nutrient_today(daytime:str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
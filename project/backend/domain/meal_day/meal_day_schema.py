@@ -95,4 +95,24 @@ class MealDay_today_nutrient_schema(BaseModel):
     gb_fat: Optional[float]=None
 
 class MealDay_avg_calorie_schecma(BaseModel):
-    calorie: float
\ No newline at end of file
+    calorie: float
+
+class MealDay_stats_schema(BaseModel): ## 월별 식단 통계
+    year: int
+    month: int
+    days: int ## 조회 기간 중 해당 월의 일수
+    record_count: int = 0 ## nowcalorie > 0 인 기록일수
+    avg_calorie: float = 0.0
+    min_calorie: float = 0.0
+    max_calorie: float = 0.0
+    carb: float = 0.0
+    protein: float = 0.0
+    fat: float = 0.0
+    weight_count: int = 0 ## 몸무게를 기록한 일수
+    avg_weight: Optional[float] = None
+    min_weight: Optional[float] = None
+    max_weight: Optional[float] = None
+
+class MealDay_stats_list_schema(BaseModel):
+    months: List[MealDay_stats_schema]
+    weight_change: Optional[float] = None ## 첫 몸무게 기록 월 평균 대비 마지막 월 평균 변화량
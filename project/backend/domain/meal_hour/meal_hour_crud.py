@@ -77,6 +77,15 @@ def create_file_name(user_id:int)->str:
     filename = f"{user_id}_{time}"
     return filename
 
+def top_label(food_info: dict):
+    ## yolo 서버의 top_k(신뢰도 순)에서 가장 높은 라벨, 없으면 labels의 첫 값
+    top_k = food_info.get("top_k") or []
+    label = top_k[0]["name"] if top_k else (food_info.get("labels") or [None])[0]
+    try:
+        return int(label)
+    except (TypeError, ValueError):
+        return None
+
 def time_parse(time: str):
     if time == "아침":
         return MealTime.BREAKFAST
@@ -1,5 +1,5 @@
 import os
-from urllib.parse import quote
+import asyncio
 from typing import List
 from datetime import datetime, timedelta, time, date
 from models import MealDay, MealHour, TrackRoutine,User, Mentor, TrackRoutineDate
@@ -7,17 +7,18 @@ from firebase_config import send_fcm_data_noti,send_fcm_notification
 from fastapi import APIRouter, Form,File,Depends, HTTPException,UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy import or_,and_
-import requests
+import httpx
 from starlette import status
 from database import get_db
 from domain.track_routine import track_routine_crud
 from domain.user import user_crud
 from domain.mentor import mentor_crud
 from domain.meal_hour import meal_hour_schema,meal_hour_crud
+from domain.meal_hour.yolo_service import yolo_client, CircuitOpenError, YOLO_MAX_UPLOAD_BYTES, YOLO_MAX_BATCH_FILES
 from domain.meal_day import  meal_day_crud
 from domain.user.user_router import get_current_user
 from domain.group.group_crud import get_group_track_id_in_part_state_start
-from firebase_config import bucket
+from storage_service import object_storage, signed_url_service
 import json
 import uuid
 
@@ -25,6 +26,22 @@ router=APIRouter(
     prefix="/meal_hour"
 )
 
+# 사진 파일 시그니처 (JPEG, PNG, GIF, BMP, TIFF), WEBP는 RIFF....WEBP
+IMAGE_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF8", b"BM", b"II*\x00", b"MM\x00*")
+
+
+async def read_image(file: UploadFile, max_bytes: int = YOLO_MAX_UPLOAD_BYTES) -> bytes:
+    """업로드된 사진을 크기 제한(YOLO_MAX_UPLOAD_BYTES)과 사진 시그니처를 확인하며 읽음"""
+    contents = bytearray()
+    while chunk := await file.read(64 * 1024):
+        contents += chunk
+        if len(contents) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Image is larger than {max_bytes} bytes")
+    head = bytes(contents[:12])
+    if not (head.startswith(IMAGE_SIGNATURES) or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")):
+        raise HTTPException(status_code=415, detail="Not an image")
+    return bytes(contents)
+
 @router.get("/get/meal_hour/mine/{times}", response_model=meal_hour_schema.MealHour_schema)
 def get_MealHour_date(times:str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """
@@ -94,8 +111,7 @@ async def get_mealhour_picture(user_id: int, times: str, db: Session = Depends(g
             raise HTTPException(status_code=404, detail="Picture not found")
 
         # 서명된 URL 생성 (URL은 1시간 동안 유효)
-        blob = bucket.blob(mealhour.picture)
-        signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
+        signed_url = await signed_url_service.signed_url(mealhour.picture, expiration=timedelta(hours=1))
 
         return {"image_url": signed_url}
     except Exception as e:
@@ -128,8 +144,7 @@ async def get_mealhour_picture(times: str, current_user: User = Depends(get_curr
             raise HTTPException(status_code=404, detail="Picture not found")
 
         # 서명된 URL 생성 (URL은 1시간 동안 유효)
-        blob = bucket.blob(mealhour.picture)
-        signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
+        signed_url = await signed_url_service.signed_url(mealhour.picture, expiration=timedelta(hours=1))
 
         return {"image_url": signed_url}
     except Exception as e:
@@ -145,23 +160,28 @@ async def upload_food(current_user: User = Depends(get_current_user), file: Uplo
     """
     # 고유한 파일 이름 생성
     file_id = meal_hour_crud.create_file_name(user_id=current_user.id)
-
-    #Firebase Storage에 파일 업로드
-    temp_blob = bucket.blob(f"temp/{file_id}")
-    temp_blob.upload_from_file(file.file, content_type=file.content_type)
-
-    #Yolov 서버로 파일 전송(yolov 서버가 firebase 사진에 접근)
-    url = temp_blob.generate_signed_url(expiration=timedelta(hours=1)) #60분 유효url
-    print(url)
-    encoded_url = quote(url, safe='')
-
-    # YOLO 서버에 POST 요청을 보내고, 응답 받기
-    response = requests.post(f"https://hamster-delicate-sparrow.ngrok-free.app/yolo/?url={encoded_url}", headers={'accept': 'application/json', 'ngrok-skip-browser-warning':'hello'})
-    #response = requests.post(f"http://110.8.6.21/yolo/?url={encoded_url}", headers={'accept': 'application/json'})
+    contents = await read_image(file)
+
+    #Firebase Storage 업로드와 Yolov 서버 전송을 동시에 진행 (yolov 서버가 firebase에서 다시 받지 않음)
+    temp_name = f"temp/{file_id}"
+    upload = object_storage.upload(temp_name, contents, content_type=file.content_type)
+    # YOLO 서버에 사진을 직접 POST 요청으로 보내고, 응답 받기
+    analyze = yolo_client.analyze_image(contents, file.filename, file.content_type)
+    uploaded, response = await asyncio.gather(upload, analyze, return_exceptions=True)
+    if isinstance(uploaded, Exception):
+        raise HTTPException(status_code=500, detail=f"Upload failed: {uploaded}")
+    if isinstance(response, (CircuitOpenError, httpx.HTTPError)):
+        await object_storage.delete(temp_name)  #firebase에 저장된 임시파일삭제
+        raise HTTPException(status_code=503, detail="YOLOv Server unavailable")
+    if isinstance(response, Exception):
+        await object_storage.delete(temp_name)
+        raise response
+
+    url = await object_storage.signed_url(temp_name, expiration=timedelta(hours=1)) #60분 유효url
     print(response.status_code)
     # Yolov 서버 응답 확인 - 실패시 0 출력
     if response.status_code != 201:
-       temp_blob.delete()  #firebase에 저장된 임시파일삭제
+       await object_storage.delete(temp_name)  #firebase에 저장된 임시파일삭제
        raise HTTPException(status_code=400, detail="YOLOv Server failed")
        return 0
 
@@ -170,9 +190,76 @@ async def upload_food(current_user: User = Depends(get_current_user), file: Uplo
     print(food_info)
     is_success = bool(food_info.get("is_success", False))
     if is_success == False:
-        temp_blob.delete()
+        await object_storage.delete(temp_name)
         raise HTTPException(status_code=400, detail="No food data")
-    return {"file_path": temp_blob.name, "food_info": food_info, "image_url": url} ## 임시파일이름, food정보, url 반환
+    return {"file_path": temp_name, "food_info": food_info, "image_url": url} ## 임시파일이름, food정보, url 반환
+
+@router.post("/upload_temp/batch", response_model=meal_hour_schema.MealHour_upload_temp_batch_schema)
+async def upload_food_batch(current_user: User = Depends(get_current_user), files: List[UploadFile] = File(...)):
+    """
+    식단 사진 여러 장을 한 번에 firebase에 임시저장 및 yolo서버로부터 food정보 Get
+     - 입력예시 : 사진파일 여러 개
+     - 출력 : 사진별 file_path, food_info, image_url (실패한 사진은 error)
+     - 사진은 최대 YOLO_MAX_BATCH_FILES장
+    """
+    # 업로드 전에 확인 (YOLO 서버가 요청 전체를 거절하면 모든 사진을 올렸다가 지워야 함)
+    if len(files) > YOLO_MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {YOLO_MAX_BATCH_FILES} images per batch")
+    file_id = meal_hour_crud.create_file_name(user_id=current_user.id)
+    #크기 초과 / 사진이 아닌 파일은 해당 사진만 실패 처리
+    contents = await asyncio.gather(*(read_image(file) for file in files), return_exceptions=True)
+    items = {}
+    for i, (file, data) in enumerate(zip(files, contents)):
+        if isinstance(data, HTTPException):
+            items[i] = {"index": i, "filename": file.filename, "error": data.detail}
+        elif isinstance(data, Exception):
+            items[i] = {"index": i, "filename": file.filename, "error": str(data)}
+    readable = [i for i in range(len(files)) if i not in items]
+    temp_names = {i: f"temp/{file_id}_{i}" for i in readable}
+
+    failed = []
+    if readable:
+        #Firebase Storage 업로드는 사진별로 동시에, Yolov 서버에는 한 번의 요청으로 전송 (읽은 사진만)
+        uploads = object_storage.upload_many([(temp_names[i], contents[i], files[i].content_type) for i in readable])
+        analyze = yolo_client.analyze_images([(files[i].filename, contents[i], files[i].content_type)
+                                              for i in readable])
+        uploaded, response = await asyncio.gather(uploads, analyze, return_exceptions=True)
+
+        yolo_items = {}
+        yolo_error = None
+        if isinstance(response, Exception):
+            yolo_error = "YOLOv Server unavailable"
+        elif response.status_code != 201:
+            yolo_error = "YOLOv Server failed"
+        else:
+            # YOLO 응답의 index는 보낸 사진 목록 기준이라 원래 index로 변환
+            yolo_items = {readable[item["index"]]: item for item in response.json()["items"]}
+
+        for n, i in enumerate(readable):
+            name, file = temp_names[i], files[i]
+            if isinstance(uploaded[n], Exception):
+                items[i] = {"index": i, "filename": file.filename, "error": f"Upload failed: {uploaded[n]}"}
+                continue
+            item = yolo_items.get(i, {})
+            food_info = item.get("result")
+            error = yolo_error or item.get("error")
+            if error is None and not (food_info and food_info.get("is_success", False)):
+                error = "No food data"
+            if error is not None:
+                failed.append(name)
+                items[i] = {"index": i, "filename": file.filename, "error": error}
+            else:
+                items[i] = {"index": i, "filename": file.filename, "file_path": name, "food_info": food_info}
+    items = [items[i] for i in sorted(items)]
+
+    #실패한 임시파일은 한 번에 삭제, 성공한 사진은 서명 URL 한 번에 생성 (60분 유효url)
+    succeeded = [item for item in items if "file_path" in item]
+    _, urls = await asyncio.gather(object_storage.delete_many(failed),
+                                   object_storage.signed_urls([item["file_path"] for item in succeeded],
+                                                              expiration=timedelta(hours=1)))
+    for item, url in zip(succeeded, urls):
+        item["image_url"] = url
+    return {"items": items}
 
 @router.delete("/remove/{times}")
 async def remove_meal(times:str,current_user: User = Depends(get_current_user), db:Session = Depends(get_db)):
@@ -197,10 +284,9 @@ async def remove_meal(times:str,current_user: User = Depends(get_current_user),
 
      daily_post=meal_hour_crud.minus_daily_post(db,user_id=current_user.id,date=date,new_food=meal)
 
-     blob = bucket.blob(meal.picture)
-
-     if blob.exists():
-         blob.delete()
+     if meal.picture:
+         await object_storage.delete(meal.picture)
+         signed_url_service.forget(meal.picture)
 
      db.delete(meal)
      db.commit()
@@ -235,17 +321,14 @@ async def register_meal(times: str, hourminute: str,file_path: str = Form(...),
     if mealhour_check:
         raise HTTPException(status_code=400, detail="Already registered mealhour")
 
-    temp_blob = bucket.blob(file_path)
-
-    if not temp_blob.exists():
+    if not await object_storage.exists(file_path):
         raise HTTPException(status_code=400, detail="Temporary file does not exist")
 
     # 임시 파일을 meal 폴더로 이동
-    meal_blob = bucket.blob(f"meal/{os.path.basename(file_path)}")
-    bucket.rename_blob(temp_blob, meal_blob.name)
+    meal_name = await object_storage.rename(file_path, f"meal/{os.path.basename(file_path)}")
 
     # 서명된 URL 생성
-    signed_url = meal_blob.generate_signed_url(expiration=timedelta(hours=1)) #60분
+    signed_url = await signed_url_service.signed_url(meal_name, expiration=timedelta(hours=1)) #60분
 
     #food_info를 Json에서 파싱
     food_info_dict = json.loads(food_info)
@@ -254,7 +337,7 @@ async def register_meal(times: str, hourminute: str,file_path: str = Form(...),
     new_food = MealHour(
         user_id=current_user.id,
         name=food_info_dict.get("name",""),
-        picture=meal_blob.name,
+        picture=meal_name,
         text=text,
         date=date_time,  # 현재 시간을 기본값으로 설정
         heart=False,
@@ -267,7 +350,7 @@ async def register_meal(times: str, hourminute: str,file_path: str = Form(...),
         size=float(food_info_dict.get("weight", 0.0)),
         track_goal=None,
         daymeal_id=daymeal.id,
-        label= int(food_info_dict.get("labels", [None])[0])
+        label= meal_hour_crud.top_label(food_info_dict)
     )
     daily_post = meal_hour_crud.plus_daily_post(db, current_user.id, date, new_food)
 
@@ -280,15 +363,10 @@ async def register_meal(times: str, hourminute: str,file_path: str = Form(...),
             raise HTTPException(status_code=404, detail="User or Group not found")
         group, cheating_count, user_id2, flag, finish_date = group_part
         days = (date - group.start_day).days + 1
-        trackroutines = track_routine_crud.get_track_routine_by_track_id(db, track_id=daymeal.track_id)
-        if trackroutines is not None:
-            for trackroutin in trackroutines:
-                trackroutindates = track_routine_crud.get_trackroutinedate_by_trackroutine_id_weekday_time_date(db, trackroutin_id=trackroutin.id,
-                                                                                                                weekday= weekday_number,time=mealtime,
-                                                                                                                date=days)
-                if trackroutindates and new_food.name in trackroutin.title:
-                    goal = True
-                    break;
+        # 캐시된 트랙 스케줄에서 해당 일차/요일/식사시간 루틴 중 음식 이름이 맞는 것이 있는지 확인
+        schedule = track_routine_crud.get_track_schedule(db, track_id=daymeal.track_id)
+        goal = any(slot.time == mealtime and new_food.name in slot.title
+                   for slot in schedule.routine_slots(days, weekday_number))
 
     add_food = meal_hour_crud.create_mealhour(db, mealhour=new_food,track_goal=goal)
 
@@ -314,10 +392,7 @@ async def remove_temp_meal(file_path: str = Form(...)):
     식단시간별(MealHour) 식단등록시 뒤로가기를 통한 임시저장된 음식사진삭제 : 10page 4-2번(뒤로가기)
      - 입력예시 : file_path (meal_hour/upload_temp api로 얻은 임시 파일경로)
     """
-    temp_blob = bucket.blob(file_path)
-
-    if temp_blob.exists():
-        temp_blob.delete()
+    await object_storage.delete(file_path)
 
     return {"detail": "Temporary file removed"}
 
@@ -2,7 +2,7 @@ import datetime
 
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class MealHour_schema(BaseModel):
     id: int
@@ -44,4 +44,15 @@ class MealHour_daymeal_get_picture_schema(BaseModel):
     picture: str
 
 class MealHour_track_get_schema(BaseModel):
-    track_goal: bool
\ No newline at end of file
+    track_goal: bool
+
+class MealHour_upload_temp_item_schema(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    file_path: Optional[str] = None
+    food_info: Optional[dict] = None
+    image_url: Optional[str] = None
+    error: Optional[str] = None ## 실패한 사진만 에러 메시지
+
+class MealHour_upload_temp_batch_schema(BaseModel):
+    items: List[MealHour_upload_temp_item_schema]
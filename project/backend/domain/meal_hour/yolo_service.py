@@ -0,0 +1,130 @@
+import asyncio
+import time
+import httpx
+from starlette.config import Config
+
+config = Config('.env')
+
+# YOLO 추론 서버 설정
+YOLO_BASE_URL = config('YOLO_BASE_URL', default='http://localhost')
+YOLO_TIMEOUT = config('YOLO_TIMEOUT', cast=float, default=30.0)
+YOLO_RETRIES = config('YOLO_RETRIES', cast=int, default=2)
+YOLO_BACKOFF = config('YOLO_BACKOFF', cast=float, default=0.5)
+YOLO_MAX_CONNECTIONS = config('YOLO_MAX_CONNECTIONS', cast=int, default=20)
+YOLO_BREAKER_THRESHOLD = config('YOLO_BREAKER_THRESHOLD', cast=int, default=5)
+YOLO_BREAKER_RESET = config('YOLO_BREAKER_RESET', cast=float, default=30.0)
+# YOLO 서버의 YOLO_DOWNLOAD_MAX_BYTES와 같은 값으로 맞출 것
+YOLO_MAX_UPLOAD_BYTES = config('YOLO_MAX_UPLOAD_BYTES', cast=int, default=20 * 1024 * 1024)
+# YOLO 서버의 YOLO_MAX_BATCH_FILES와 같은 값으로 맞출 것
+YOLO_MAX_BATCH_FILES = config('YOLO_MAX_BATCH_FILES', cast=int, default=32)
+
+
+# 재시도해도 안전한 오류 : 요청이 아직 서버에 전달되지 않은 경우
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """연속 실패가 threshold번 쌓이면 reset_timeout초 동안 요청을 바로 거절하고,
+    그 뒤 한 번 시도해서 성공하면 다시 닫힘"""
+
+    def __init__(self, threshold: int = YOLO_BREAKER_THRESHOLD, reset_timeout: float = YOLO_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+        return time.monotonic() - self.opened_at < self.reset_timeout
+
+    def check(self):
+        if self.is_open:
+            raise CircuitOpenError("YOLO server circuit is open")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class YoloClient:
+    """앱 lifespan 동안 하나의 커넥션 풀을 공유하는 YOLO 서버 비동기 클라이언트"""
+
+    def __init__(self, base_url: str = YOLO_BASE_URL, timeout: float = YOLO_TIMEOUT,
+                 retries: int = YOLO_RETRIES, backoff: float = YOLO_BACKOFF,
+                 breaker: CircuitBreaker = None, transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.transport = transport  # 테스트에서 stub 서버 대신 httpx.MockTransport 사용 가능
+        self._client = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=YOLO_MAX_CONNECTIONS,
+                                    max_keepalive_connections=YOLO_MAX_CONNECTIONS),
+                headers={'accept': 'application/json', 'ngrok-skip-browser-warning': 'hello'},
+                transport=self.transport,
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, timeout: float = None, **kwargs) -> httpx.Response:
+        self.breaker.check()
+        await self.start()
+        timeout = timeout or self.timeout
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._client.request(method, path, timeout=timeout, **kwargs)
+            except RETRYABLE_ERRORS:
+                # 요청이 서버에 전달되기 전의 실패(연결 실패 / 연결 타임아웃 / 풀 대기 타임아웃)만 재시도
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    raise
+            except httpx.TransportError:
+                # 읽기 타임아웃 등은 서버가 이미 추론 중일 수 있어서 재시도하지 않음
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    return response
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def analyze_image(self, contents: bytes, filename: str, content_type: str,
+                            timeout: float = None, annotate: bool = False) -> httpx.Response:
+        """사진 bytes를 YOLO 서버의 /yolo/image 로 전송
+        (backend는 라벨/영양정보만 사용하므로 기본적으로 박스 이미지 렌더링 생략)"""
+        return await self._request("POST", "/yolo/image", timeout=timeout,
+                                   params={"annotate": str(annotate).lower()},
+                                   files={"file": (filename, contents, content_type)})
+
+    async def analyze_images(self, images: list, timeout: float = None, annotate: bool = False) -> httpx.Response:
+        """여러 장의 사진을 /yolo/images 로 한 번에 전송 (images: (filename, contents, content_type) 리스트)"""
+        return await self._request("POST", "/yolo/images", timeout=timeout,
+                                   params={"annotate": str(annotate).lower()},
+                                   files=[("files", image) for image in images])
+
+
+yolo_client = YoloClient()
@@ -0,0 +1,32 @@
+import os
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from starlette import status
+
+from storage_service import LocalStorage, STORAGE_LOCAL_BASE_URL, object_storage
+
+# local 백엔드 서명 URL(STORAGE_LOCAL_BASE_URL/<name>?expires=&signature=)을 받는 경로
+router = APIRouter(
+    prefix=urlparse(STORAGE_LOCAL_BASE_URL).path.rstrip('/') or "/storage"
+)
+
+
+@router.get("/{name:path}")
+def get_local_storage_file(name: str, expires: int, signature: str):
+    """
+    local 스토리지 파일 조회 (STORAGE_BACKEND=local 일 때만)
+     - 서명과 만료시간을 검증한 뒤 파일 반환
+    """
+    if not isinstance(object_storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not object_storage.verify(name, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+    try:
+        path = object_storage.path(name)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return FileResponse(path)
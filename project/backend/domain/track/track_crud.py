@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from domain.track.track_schema import Track_list_get_schema, TrackCreate, TrackSchema
 from datetime import datetime, timedelta
 from domain.group import group_crud
+from domain.track_routine import track_routine_crud
 
 
 def track_create(db: Session, user: User):
@@ -263,4 +264,5 @@ def soft_delete_track(db:Session, track_id: int):
         routine.delete = True
 
     db.commit()
+    track_routine_crud.invalidate_track_schedule(track_id)
     return 1
@@ -1,3 +1,6 @@
+import threading
+from array import array
+from collections import namedtuple
 from calendar import calendar
 from datetime import date, datetime, timedelta, time
 from http import HTTPStatus
@@ -11,6 +14,14 @@ from models import TrackRoutine, User, MealHour, Group, Track, TrackRoutineDate,
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 from fastapi import HTTPException
+from cachetools import TTLCache
+from starlette.config import Config
+
+config = Config('.env')
+
+# 트랙별 일차 스케줄 캐시 : 루틴 수정시 바로 무효화, 다른 워커에서 수정한 경우 TTL 안에 반영
+TRACK_SCHEDULE_CACHE_SIZE = config('TRACK_SCHEDULE_CACHE_SIZE', cast=int, default=1024)
+TRACK_SCHEDULE_TTL = config('TRACK_SCHEDULE_TTL', cast=float, default=300.0)
 
 
 def get_trackRoutine_by_track_id(db: Session, track_id: int):
@@ -41,6 +52,7 @@ def create(db: Session, track_id: int,
     db.add(db_routine)
     db.commit()
     db.refresh(db_routine)
+    invalidate_track_schedule(track_id)
     return db_routine
 
 
@@ -54,6 +66,7 @@ def delete_all(db, track_id):
         db.delete(routine)
         db.commit()
         # db.refresh(routine)
+    invalidate_track_schedule(track_id)
 
 
 def get_routine_by_routine_id(db: Session, routine_id: int):
@@ -71,30 +84,111 @@ def get_track_routine_by_track_id(db: Session, track_id: int):
     return track_routines
 
 
+RoutineSlot = namedtuple("RoutineSlot", ["routine_id", "title", "time", "calorie"])
+
+
+class TrackSchedule:
+    """
+    트랙 하나의 (일차, 요일)별 목표칼로리와 루틴 슬롯을 미리 계산한 표
+     - index = 일차 * 7 + 요일, 조회는 O(1)
+     - 루틴 슬롯 : RoutineSlot(routine_id, title, time, calorie)
+    """
+
+    def __init__(self, track_id: int, rows):
+        self.track_id = track_id
+        self.days = max((row.date for row in rows), default=0)
+        size = (self.days + 1) * 7
+        self.calories = array('d', [0.0]) * size
+        self.slots = [()] * size
+        for row in rows:
+            if row.date < 1 or not 0 <= row.weekday <= 6:
+                continue
+            i = row.date * 7 + row.weekday
+            self.calories[i] += row.calorie or 0.0
+            self.slots[i] += (RoutineSlot(row.routine_id, row.title, row.time, row.calorie),)
+
+    def _index(self, day: int, weekday: int):
+        if 1 <= day <= self.days and 0 <= weekday <= 6:
+            return day * 7 + weekday
+        return None
+
+    def goal_calorie(self, day: int, weekday: int) -> float:
+        i = self._index(day, weekday)
+        return self.calories[i] if i is not None else 0.0
+
+    def routine_slots(self, day: int, weekday: int) -> tuple:
+        i = self._index(day, weekday)
+        return self.slots[i] if i is not None else ()
+
+    def goal_calories(self, start: date, days: int) -> List[float]:
+        ## start부터 days일 동안의 일자별 목표칼로리 (index 0 = 1일차)
+        return [self.goal_calorie(day, (start + timedelta(days=day - 1)).weekday()) for day in range(1, days + 1)]
+
+
+_schedule_cache = TTLCache(maxsize=TRACK_SCHEDULE_CACHE_SIZE, ttl=TRACK_SCHEDULE_TTL)
+# 트랙별 무효화 횟수 : 스케줄 생성 중에 무효화되면 생성한 스케줄을 캐시에 넣지 않음
+_schedule_versions = {}
+_schedule_lock = threading.Lock()
+
+
+def compile_track_schedule(db: Session, track_id: int) -> TrackSchedule:
+    ## 삭제되지 않은 루틴과 루틴 날짜를 join 쿼리 한 번으로 읽어서 스케줄 생성
+    rows = db.query(
+        TrackRoutineDate.date,
+        TrackRoutineDate.weekday,
+        TrackRoutineDate.time,
+        TrackRoutine.id.label("routine_id"),
+        TrackRoutine.title,
+        TrackRoutine.calorie
+    ).join(TrackRoutine, TrackRoutine.id == TrackRoutineDate.routine_id).filter(
+        TrackRoutine.track_id == track_id,
+        TrackRoutine.delete == False
+    ).all()
+    return TrackSchedule(track_id, rows)
+
+
+def get_track_schedule(db: Session, track_id: int) -> TrackSchedule:
+    """
+    조회용 캐시된 스케줄 (다른 워커의 수정은 TRACK_SCHEDULE_TTL 안에 반영)
+     - DB에 저장하는 값은 compile_track_schedule로 직접 계산할 것
+    """
+    with _schedule_lock:
+        schedule = _schedule_cache.get(track_id)
+        version = _schedule_versions.get(track_id, 0)
+    if schedule is None:
+        schedule = compile_track_schedule(db, track_id)
+        with _schedule_lock:
+            if _schedule_versions.get(track_id, 0) == version:
+                _schedule_cache[track_id] = schedule
+    return schedule
+
+
+def invalidate_track_schedule(track_id: int):
+    ## 루틴 / 루틴 날짜가 바뀌면 호출
+    with _schedule_lock:
+        _schedule_cache.pop(track_id, None)
+        _schedule_versions[track_id] = _schedule_versions.get(track_id, 0) + 1
+
+
+def invalidate_routine_schedule(db: Session, routine_id: int):
+    track_id = db.query(TrackRoutine.track_id).filter(TrackRoutine.id == routine_id).scalar()
+    if track_id is not None:
+        invalidate_track_schedule(track_id)
+
+
 ##24.09.09
 def get_goal_caloire_bydate_using_trackroutine(db: Session, days: int, track_id: int, date: date) -> float:
     # 요일을 정수로 얻기 (월요일=0, 일요일=6)
     ## 월요일부터 시작하기 가능하기로해서 이거가능 안그러면 수정해야함
     ## 트랙루틴들의 시작일자date가 같다고 가정할경우임이건
-    weekday_number = date.weekday()
+    return get_track_schedule(db, track_id).goal_calorie(days, date.weekday())
 
-    # 요일과 날짜에 맞는 트랙 루틴 조회
-    trackroutines = db.query(TrackRoutine).filter(
-        TrackRoutine.track_id == track_id
-    ).all()
-
-    calorie = 0.0
-    if not trackroutines:
-        return calorie
-    for trackroutine in trackroutines:
-        trackroutinedates = db.query(TrackRoutineDate).filter(
-            and_(TrackRoutineDate.routine_id == trackroutine.id,
-                 TrackRoutineDate.weekday == weekday_number,
-                 TrackRoutineDate.date == days)
-        ).all()
-        for trackroutinedate in trackroutinedates:
-            calorie += trackroutine.calorie
-    return calorie
+def get_goal_calorie_vector(db: Session, track_id: int, start: date, days: int) -> List[float]:
+    """
+    트랙을 start부터 days일 동안 사용할 때 일자별 목표칼로리 (index 0 = 1일차)
+     - MealDay.goalcalorie에 저장되는 값이라 캐시를 쓰지 않고 쿼리 한 번으로 새로 계산
+    """
+    return compile_track_schedule(db, track_id).goal_calories(start, days)
 
     # def get_goal_caloire_bydate_using_trackroutine(db: Session, days: int, track_id: int, date: date) -> float:
     # # 요일을 정수로 얻기 (월요일=0, 일요일=6)
@@ -144,6 +238,7 @@ def update_routine(_routine_id: int, _routine: track_routine_schema.TrackRoutine
     db_routine.repeat = _routine.repeat
     db.commit()
     db.refresh(db_routine)
+    invalidate_track_schedule(db_routine.track_id)
 
 
 def get_calorie_average(track_id: int, db: Session):
@@ -267,6 +362,7 @@ def create_routine(db: Session, track_id: int):
     )
     db.add(db_routine)
     db.commit()
+    invalidate_track_schedule(track_id)
     return db_routine
 
 
@@ -299,6 +395,7 @@ def init_routine_date(week: int, weekday: str, routine_id: int, db: Session):
     )
     db.add(db_routine_date)
     db.commit()
+    invalidate_routine_schedule(db, routine_id)
     return db_routine_date
 
 
@@ -320,6 +417,7 @@ def update_weekday(db: Session, routine_id: int, weekday: str):
     db_routine.weekday = weekday_int
     db_routine.date = day
     db.commit()
+    invalidate_routine_schedule(db, routine_id)
     return db_routine
 
 
@@ -327,6 +425,7 @@ def update_calorie(db: Session, routine_id: int, calorie: int):
     db_routine = db.query(TrackRoutine).filter(TrackRoutine.id == routine_id).first()
     db_routine.calorie = calorie
     db.commit()
+    invalidate_track_schedule(db_routine.track_id)
 
 
 def create_track_routine_repeat(routine_id: int, user: User, db: Session) \
@@ -346,6 +445,7 @@ def create_track_routine_repeat(routine_id: int, user: User, db: Session) \
         db.add(db_routine_date)
         db.commit()
         routines.append(track_routine_schema.TrackRoutineDateSchema.from_orm(db_routine_date))
+    invalidate_track_schedule(routine.track_id)
 
     return routines
 
@@ -363,6 +463,7 @@ def delete_routine(db: Session, routine_id: int):
     routine = db.query(TrackRoutine).filter(TrackRoutine.id == routine_id).first()
     routine.delete = True
     db.commit()
+    invalidate_track_schedule(routine.track_id)
 
 
 def get_routine_list(db: Session, track_id: int, week: int, weekday: int):
@@ -406,13 +507,16 @@ def update_meal_time(meal_time: int, routine_date_id: int, db: Session):
     routine_date = db.query(TrackRoutineDate).filter(TrackRoutineDate.id == routine_date_id).first()
     routine_date.time = meal_time
     db.commit()
+    invalidate_routine_schedule(db, routine_date.routine_id)
     return routine_date.time
 
 
 def delete_routine_date(id: int, db: Session):
     db_routine_date = db.query(TrackRoutineDate).filter(TrackRoutineDate.id == id).first()
+    routine_id = db_routine_date.routine_id
     db.delete(db_routine_date)
     db.commit()
+    invalidate_routine_schedule(db, routine_id)
 
 
 def insert_time(_time: int):
@@ -473,6 +577,7 @@ def update_routine_and_date(routine_date_id: int, _track_routine: track_routine_
             db.add(db_routine_date)
 
     db.commit()
+    invalidate_track_schedule(db_routine.track_id)
     return db_routine_date, db_routine
 
 def get_trackroutinedate_all_by_routine_id_weekday_date(db:Session, routine_id: int, weekday: int, date: int):
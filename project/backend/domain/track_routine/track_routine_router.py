@@ -307,20 +307,11 @@ def get_TrackRoutine_track_title_calorie_user(time: str, current_user: User = De
     group, cheating_count, user_id2, flag, finish_date =group_info
     days = (date - group.start_day).days + 1
 
-    combine_result=[]
-    trackroutines = track_routine_crud.get_trackroutine_all_by_track_id_delete_false(db,track_id=mealtoday.track_id)
-
-    if not trackroutines:
+    ## 캐시된 트랙 스케줄에서 해당 일차/요일의 루틴 조회 (삭제된 루틴 제외)
+    schedule = track_routine_crud.get_track_schedule(db, track_id=mealtoday.track_id)
+    if schedule.days == 0:
         raise HTTPException(status_code=404, detail="No Use TrackRoutine today")
-    for trackroutine in trackroutines:
-        trackroutinedates = track_routine_crud.get_trackroutinedate_all_by_routine_id_weekday_date(db, routine_id=trackroutine.id,
-                                                                                                   weekday=weekday_number,
-                                                                                                   date=days)
-        for trackroutinedate in trackroutinedates:
-            result = {"title":trackroutine.title,"calorie":trackroutine.calorie}
-            combine_result.append(result)
-
-    return combine_result
+    return [{"title": slot.title, "calorie": slot.calorie} for slot in schedule.routine_slots(days, weekday_number)]
 #
 # @router.get("/get/{user_id}/{time}/title_calorie/formentor", response_model=List[track_routine_schema.TrackRoutine_namecalorie_schema])
 # def get_TrackRoutine_track_title_calorie_mentor(user_id: int, time: str, db: Session = Depends(get_db)):
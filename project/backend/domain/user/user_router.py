@@ -27,7 +27,7 @@ from models import User
 from domain.user.my_oauth2 import OAuth2PasswordRequestFormWithEmail, OAuth2PasswordBearerWithEmail
 from exceptions import InvalidAuthorizationCode, InvalidToken
 import uuid
-from firebase_config import bucket
+from storage_service import object_storage, signed_url_service
 
 config = Config('.env')
 
@@ -843,22 +843,21 @@ async def upload_profile_picture(current_user: User = Depends(get_current_user),
 
         # 고유한 파일 이름 생성
         file_id = meal_hour_crud.create_file_name(user_id=current_user.id)
-        blob = bucket.blob(f"profile_pictures/{file_id}")
+        picture_name = f"profile_pictures/{file_id}"
 
         # 파일 업로드
-        blob.upload_from_file(file.file, content_type=file.content_type)
+        await object_storage.upload(picture_name, await file.read(), content_type=file.content_type)
 
         # 기존 프로필 사진 삭제
         if user.profile_picture:
-            old_blob = bucket.blob(user.profile_picture)
-            if old_blob.exists():
-                old_blob.delete()
+            await object_storage.delete(user.profile_picture)
+            signed_url_service.forget(user.profile_picture)
 
         # 서명된 URL 생성 (URL은 1시간 동안 유효)
-        signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
+        signed_url = await signed_url_service.signed_url(picture_name, expiration=timedelta(hours=1))
 
         # 데이터베이스에 파일 경로와 URL 저장
-        user.profile_picture = f"profile_pictures/{file_id}"
+        user.profile_picture = picture_name
         db.commit()
 
         return {"file_id": file_id, "image_url": signed_url}
@@ -878,8 +877,7 @@ async def get_profile_picture(current_user: User = Depends(get_current_user), db
             raise HTTPException(status_code=404, detail="Profile picture not found")
 
         # 서명된 URL 생성 (URL은 1시간 동안 유효)
-        blob = bucket.blob(user.profile_picture)
-        signed_url = blob.generate_signed_url(expiration=timedelta(hours=1))
+        signed_url = await signed_url_service.signed_url(user.profile_picture, expiration=timedelta(hours=1))
 
         return {"image_url": signed_url}
     except Exception as e:
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
@@ -12,9 +13,21 @@ from domain.track_routine import track_routine_router
 from domain.meal_day import meal_day_router
 from domain.meal_hour import meal_hour_router
 from domain.comment import comment_router
+from domain.storage import storage_router
+from domain.meal_hour.yolo_service import yolo_client
+from storage_service import object_storage
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # YOLO 서버 커넥션 풀은 앱 lifespan 동안 공유
+    await yolo_client.start()
+    yield
+    await yolo_client.close()
+    object_storage.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "*",
@@ -42,4 +55,5 @@ app.include_router(meal_day_router.router)
 app.include_router(meal_hour_router.router)
 app.include_router(comment_router.router)
 app.include_router(track_routine_router.router)
-app.include_router(clear_routine_router.router)
\ No newline at end of file
+app.include_router(clear_routine_router.router)
+app.include_router(storage_router.router)
\ No newline at end of file
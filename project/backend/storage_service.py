@@ -0,0 +1,252 @@
+import asyncio
+from abc import ABC, abstractmethod
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from cachetools import LRUCache
+from starlette.config import Config
+
+config = Config('.env')
+
+# 오브젝트 스토리지 설정
+STORAGE_BACKEND = config('STORAGE_BACKEND', default='firebase')  # firebase 또는 local
+STORAGE_MAX_WORKERS = config('STORAGE_MAX_WORKERS', cast=int, default=16)  # 스토리지 I/O 전용 스레드 수
+STORAGE_LOCAL_DIR = config('STORAGE_LOCAL_DIR', default='storage')
+STORAGE_LOCAL_BASE_URL = config('STORAGE_LOCAL_BASE_URL', default='/storage')
+STORAGE_LOCAL_SECRET = config('STORAGE_LOCAL_SECRET', default=None)  # local 백엔드 서명 키, local 사용시 필수
+SIGNED_URL_CACHE_SIZE = config('SIGNED_URL_CACHE_SIZE', cast=int, default=10000)
+SIGNED_URL_REFRESH_MARGIN = config('SIGNED_URL_REFRESH_MARGIN', cast=float, default=300.0)  # 만료 몇 초 전부터 새로 생성할지
+
+SIGNED_URL_EXPIRATION = timedelta(hours=1)
+
+
+class StorageService(ABC):
+    """오브젝트 스토리지 인터페이스.
+    동기 SDK 호출은 전용 스레드 풀에서 실행해서 이벤트 루프를 막지 않음"""
+
+    def __init__(self, max_workers: int = STORAGE_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    # 구현체가 채우는 동기 연산
+    @abstractmethod
+    def _upload(self, name: str, data: bytes, content_type: Optional[str]):
+        ...
+
+    @abstractmethod
+    def _exists(self, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def _delete(self, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def _rename(self, name: str, new_name: str) -> str:
+        ...
+
+    @abstractmethod
+    def _signed_url(self, name: str, expiration: timedelta) -> str:
+        ...
+
+    async def upload(self, name: str, data: bytes, content_type: Optional[str] = None):
+        await self._run(self._upload, name, data, content_type)
+
+    async def exists(self, name: str) -> bool:
+        return await self._run(self._exists, name)
+
+    async def delete(self, name: str) -> bool:
+        """파일 삭제, 없는 파일이면 False"""
+        return await self._run(self._delete, name)
+
+    async def rename(self, name: str, new_name: str) -> str:
+        """파일 이동, 이동한 파일 이름 반환"""
+        return await self._run(self._rename, name, new_name)
+
+    async def signed_url(self, name: str, expiration: timedelta = SIGNED_URL_EXPIRATION) -> str:
+        return await self._run(self._signed_url, name, expiration)
+
+    ## 배치 연산 - 실패한 항목은 결과 리스트에 예외로 들어감
+    async def upload_many(self, items: Iterable[Tuple[str, bytes, Optional[str]]]) -> list:
+        return await asyncio.gather(*(self.upload(name, data, content_type) for name, data, content_type in items),
+                                    return_exceptions=True)
+
+    async def delete_many(self, names: Iterable[str]) -> list:
+        return await asyncio.gather(*(self.delete(name) for name in names), return_exceptions=True)
+
+    async def signed_urls(self, names: List[str], expiration: timedelta = SIGNED_URL_EXPIRATION) -> List[str]:
+        """여러 파일의 서명 URL을 한 번의 스레드 작업으로 생성 (서명은 로컬 연산이라 파일마다 스레드를 쓸 필요 없음)"""
+        names = list(names)
+        if not names:
+            return []
+        return await self._run(lambda: [self._signed_url(name, expiration) for name in names])
+
+
+class FirebaseStorage(StorageService):
+    """firebase_config의 Firebase Storage 버킷 구현"""
+
+    def __init__(self, bucket=None, max_workers: int = STORAGE_MAX_WORKERS):
+        super().__init__(max_workers)
+        if bucket is None:
+            # local 백엔드는 Firebase 자격증명 없이 동작하도록 여기서 import
+            from firebase_config import bucket
+        self.bucket = bucket
+
+    def _upload(self, name, data, content_type):
+        self.bucket.blob(name).upload_from_string(data, content_type=content_type)
+
+    def _exists(self, name):
+        return self.bucket.blob(name).exists()
+
+    def _delete(self, name):
+        from google.api_core.exceptions import NotFound
+        try:
+            self.bucket.blob(name).delete()
+        except NotFound:
+            return False
+        return True
+
+    def _rename(self, name, new_name):
+        return self.bucket.rename_blob(self.bucket.blob(name), new_name).name
+
+    def _signed_url(self, name, expiration):
+        return self.bucket.blob(name).generate_signed_url(expiration=expiration)
+
+
+class LocalStorage(StorageService):
+    """로컬 디스크 구현 (테스트, 온프레미스용).
+    서명 URL은 base_url/<name>?expires=&signature= 형태이고
+    domain/storage/storage_router가 verify로 검증한 뒤 파일을 내려줌"""
+
+    def __init__(self, root: str = STORAGE_LOCAL_DIR, base_url: str = STORAGE_LOCAL_BASE_URL,
+                 secret: str = STORAGE_LOCAL_SECRET, max_workers: int = STORAGE_MAX_WORKERS):
+        if not secret:
+            raise RuntimeError("STORAGE_LOCAL_SECRET must be set to use the local storage backend")
+        super().__init__(max_workers)
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        self.secret = secret.encode()
+
+    def path(self, name: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, name))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid object name: {name}")
+        return path
+
+    def _upload(self, name, data, content_type):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _exists(self, name):
+        return os.path.isfile(self.path(name))
+
+    def _delete(self, name):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _rename(self, name, new_name):
+        new_path = self.path(new_name)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        os.replace(self.path(name), new_path)
+        return new_name
+
+    def _signature(self, name: str, expires: int) -> str:
+        return hmac.new(self.secret, f"{name}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def _signed_url(self, name, expiration):
+        expires = int(time.time() + expiration.total_seconds())
+        return f"{self.base_url}/{quote(name)}?expires={expires}&signature={self._signature(name, expires)}"
+
+    def verify(self, name: str, expires: int, signature: str) -> bool:
+        """서명 URL 검증 (만료 시간과 서명)"""
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(name, expires), signature)
+
+
+class SignedUrlService:
+    """서명 URL 캐시.
+    만료 SIGNED_URL_REFRESH_MARGIN초 전까지는 같은 URL을 재사용하고, 없는 URL만 모아서 한 번에 생성.
+    서명 URL은 어느 워커에서 만들어도 유효하므로 캐시는 워커별로 두고 워커 간 공유할 상태는 없음"""
+
+    def __init__(self, storage: StorageService, maxsize: int = SIGNED_URL_CACHE_SIZE,
+                 margin: float = SIGNED_URL_REFRESH_MARGIN):
+        self.storage = storage
+        self.margin = margin
+        # name -> (유효시간(초), url, 재생성 시각)
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, name: str, seconds: float, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is None or entry[0] != seconds or entry[2] <= now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    async def signed_urls(self, names: List[Optional[str]],
+                          expiration: timedelta = SIGNED_URL_EXPIRATION) -> List[Optional[str]]:
+        """names 순서대로 서명 URL 반환, 빈 이름은 None"""
+        names = list(names)
+        seconds = expiration.total_seconds()
+        now = time.monotonic()
+        urls = [self._lookup(name, seconds, now) if name else None for name in names]
+        missing = list(dict.fromkeys(name for name, url in zip(names, urls) if name and url is None))
+        if missing:
+            # 유효시간이 margin보다 짧으면 절반 시점에 재생성
+            refresh_at = now + seconds - min(self.margin, seconds / 2)
+            created = dict(zip(missing, await self.storage.signed_urls(missing, expiration)))
+            with self._lock:
+                for name, url in created.items():
+                    self._cache[name] = (seconds, url, refresh_at)
+            urls = [created.get(name, url) if name else None for name, url in zip(names, urls)]
+        return urls
+
+    async def signed_url(self, name: str, expiration: timedelta = SIGNED_URL_EXPIRATION) -> str:
+        return (await self.signed_urls([name], expiration))[0]
+
+    def forget(self, *names: str):
+        """삭제 / 이동한 파일의 URL을 캐시에서 제거"""
+        with self._lock:
+            for name in names:
+                self._cache.pop(name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+def get_storage() -> StorageService:
+    """STORAGE_BACKEND 설정에 맞는 구현 생성"""
+    if STORAGE_BACKEND == 'local':
+        return LocalStorage()
+    return FirebaseStorage()
+
+
+object_storage = get_storage()
+signed_url_service = SignedUrlService(object_storage)